@@ -6,12 +6,8 @@
 """
 
 import asyncio
-import logging
 from src.bot import main
 
 if __name__ == "__main__":
-    logging.basicConfig(
-        level=logging.INFO,
-        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    )
+    # Логирование настраивается в src.bot (см. LOG_* в src/config.py)
     asyncio.run(main()) 
\ No newline at end of file
@@ -19,10 +19,31 @@ except ImportError:
         print("Убедитесь, что вы запускаете бота из корневой директории проекта или из директории src")
         sys.exit(1)
 
-# Настройка логирования
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Словарь разделов резюме и ключевых слов для их определения
+RESUME_SECTIONS = {
+    "опыт": ["опыт", "стаж", "работал", "работаю", "лет опыта", "работа", "должность", "компания", "проект", "занимался", "делал"],
+    "образование": ["образование", "учился", "окончил", "диплом", "курсы", "университет", "институт", "школа", "колледж", "вуз", "степень", "учеба"],
+    "навыки": ["навыки", "умения", "владею", "знаю", "работаю с", "использую", "технологии", "инструменты", "языки", "фреймворки", "библиотеки", "умею"],
+    "контакты": ["контакты", "связь", "телефон", "email", "почта", "@", "telegram", "вконтакте", "linkedin", "тг", "связаться", "номер"]
+}
+
+def detect_resume_sections(message_lower: str) -> set[str]:
+    """
+    Определяет разделы резюме по ключевым словам.
+    
+    Args:
+        message_lower: Текст резюме в нижнем регистре
+        
+    Returns:
+        set[str]: Названия найденных разделов
+    """
+    return {
+        section for section, keywords in RESUME_SECTIONS.items()
+        if any(keyword in message_lower for keyword in keywords)
+    }
+
 def check_resume_locally(message: str) -> tuple[bool, str]:
     """
     Локальная проверка резюме без использования внешних API.
@@ -41,26 +62,9 @@ def check_resume_locally(message: str) -> tuple[bool, str]:
     if "#резюме" not in message_lower:
         return False, "❌ Резюме отклонено: отсутствует хэштег #резюме"
     
-    # Словарь разделов резюме и ключевых слов для их определения
-    resume_sections = {
-        "опыт": ["опыт", "стаж", "работал", "работаю", "лет опыта", "работа", "должность", "компания", "проект", "занимался", "делал"],
-        "образование": ["образование", "учился", "окончил", "диплом", "курсы", "университет", "институт", "школа", "колледж", "вуз", "степень", "учеба"],
-        "навыки": ["навыки", "умения", "владею", "знаю", "работаю с", "использую", "технологии", "инструменты", "языки", "фреймворки", "библиотеки", "умею"],
-        "контакты": ["контакты", "связь", "телефон", "email", "почта", "@", "telegram", "вконтакте", "linkedin", "тг", "связаться", "номер"]
-    }
-    
     # Проверка наличия основных разделов
-    found_sections = set()
-    missing_sections = []
-    
-    for section, keywords in resume_sections.items():
-        for keyword in keywords:
-            if keyword in message_lower:
-                found_sections.add(section)
-                break
-        
-        if section not in found_sections:
-            missing_sections.append(section)
+    found_sections = detect_resume_sections(message_lower)
+    missing_sections = [section for section in RESUME_SECTIONS if section not in found_sections]
     
     # Проверка минимальной длины резюме - снижаем требование до 20 слов
     if len(message.split()) < 20:
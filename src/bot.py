@@ -1,57 +1,84 @@
 import asyncio
 import logging
 import random
+import signal
 import sys
 import os
 from datetime import datetime, timedelta
 from aiogram import Bot, Dispatcher, types
+from aiogram.client.session.aiohttp import AiohttpSession
 from aiogram.filters import Command
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.future import select
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 
 # Добавляем родительскую директорию в sys.path для корректного импорта
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 # Пытаемся импортировать как модуль, если не получается - используем относительные пути
 try:
-    from src.models import Base, UserMessage
+    from src.models import Base, UserMessage, ChannelDelivery, DEFAULT_TENANT
     from src.config import (
-        BOT_TOKEN, CHANNEL_ID, DATABASE_URL,
+        BOT_TOKEN, CHANNEL_ID, DATABASE_URL, BOTS,
         MIN_MESSAGE_LENGTH, FORBIDDEN_WORDS, SPAM_SYMBOLS,
-        MESSAGE_INTERVAL_HOURS, LOG_LEVEL
+        MESSAGE_INTERVAL_HOURS, SEND_CHECK_MINUTES, LOG_LEVEL,
+        CHANNEL_ROUTES, FANOUT_CONCURRENCY, CHANNEL_MIN_INTERVAL_SECONDS,
+        ADMIN_IDS, PROFILE_SAMPLE_RATE, PROFILE_DIR, LOOP_LAG_THRESHOLD_MS,
+        MAX_RESUME_LENGTH, MAX_DOCUMENT_SIZE_MB, DOCUMENT_CHUNK_SIZE, EXTRACTION_WORKERS, EXTRACTION_MAX_PENDING, EXTRACTION_TIMEOUT_SECONDS,
+        STATS_RECONCILE_MINUTES,
+        LOG_ASYNC, LOG_JSON, LOG_SAMPLING, LOG_BODY_PREVIEW
     )
     from src.ai_checker import check_resume_locally
     from src.safe_migrate import safe_migrate
+    from src.routing import load_routes, route_channels, fan_out, ChannelPacer
+    from src.profiling import UpdateProfiler
+    from src.db_engine import make_async_engine, table_exists, column_exists
+    from src.document_intake import DocumentExtractor, DocumentError, read_document
+    from src.logging_setup import setup_logging, summarize_text
+    from src.stats import bump_counters, status_change, submissions_key, reposts_key, reconcile_counters, format_stats
+    from src.tenants import Tenant, TenantMiddleware, load_tenant_configs
 except ImportError:
     try:
-        from models import Base, UserMessage
+        from models import Base, UserMessage, ChannelDelivery, DEFAULT_TENANT
         from config import (
-            BOT_TOKEN, CHANNEL_ID, DATABASE_URL,
+            BOT_TOKEN, CHANNEL_ID, DATABASE_URL, BOTS,
             MIN_MESSAGE_LENGTH, FORBIDDEN_WORDS, SPAM_SYMBOLS,
-            MESSAGE_INTERVAL_HOURS, LOG_LEVEL
+            MESSAGE_INTERVAL_HOURS, SEND_CHECK_MINUTES, LOG_LEVEL,
+            CHANNEL_ROUTES, FANOUT_CONCURRENCY, CHANNEL_MIN_INTERVAL_SECONDS,
+            ADMIN_IDS, PROFILE_SAMPLE_RATE, PROFILE_DIR, LOOP_LAG_THRESHOLD_MS,
+            MAX_RESUME_LENGTH, MAX_DOCUMENT_SIZE_MB, DOCUMENT_CHUNK_SIZE, EXTRACTION_WORKERS, EXTRACTION_MAX_PENDING, EXTRACTION_TIMEOUT_SECONDS,
+            STATS_RECONCILE_MINUTES,
+            LOG_ASYNC, LOG_JSON, LOG_SAMPLING, LOG_BODY_PREVIEW
         )
         from ai_checker import check_resume_locally
         from safe_migrate import safe_migrate
+        from routing import load_routes, route_channels, fan_out, ChannelPacer
+        from profiling import UpdateProfiler
+        from db_engine import make_async_engine, table_exists, column_exists
+        from document_intake import DocumentExtractor, DocumentError, read_document
+        from logging_setup import setup_logging, summarize_text
+        from stats import bump_counters, status_change, submissions_key, reposts_key, reconcile_counters, format_stats
+        from tenants import Tenant, TenantMiddleware, load_tenant_configs
     except ImportError as e:
         print(f"Ошибка импорта модулей: {e}")
         print("Убедитесь, что вы запускаете бота из корневой директории проекта или из директории src")
         sys.exit(1)
 
 # Настройка логирования
-logging.basicConfig(level=getattr(logging, LOG_LEVEL))
+log_listener = setup_logging(LOG_LEVEL, LOG_JSON, LOG_SAMPLING, use_queue=LOG_ASYNC)
 logger = logging.getLogger(__name__)
 
-# Инициализация бота и диспетчера
-bot = Bot(token=BOT_TOKEN)
+# Инициализация диспетчера
 dp = Dispatcher()
 
 # Инициализация планировщика
 scheduler = AsyncIOScheduler()
 
 # Настройка базы данных
-engine = create_async_engine(DATABASE_URL)
+engine = make_async_engine(DATABASE_URL)
 async_session = sessionmaker(
     engine, class_=AsyncSession, expire_on_commit=False
 )
@@ -59,15 +86,55 @@ async_session = sessionmaker(
 # Глобальная очередь сообщений
 queue = None
 
+# Ограничение частоты отправки общее: каналы могут совпадать у разных ботов
+channel_pacer = ChannelPacer(CHANNEL_MIN_INTERVAL_SECONDS)
+
+# Все боты используют одну HTTP-сессию (один пул соединений к Bot API)
+http_session = AiohttpSession()
+
+# Сообщества по id бота; сообщество апдейта определяет TenantMiddleware
+tenants = {}
+
+def add_tenant(key: str, tenant_bot: Bot, channel_id: str, routes: dict) -> Tenant:
+    """
+    Регистрирует бота сообщества. Бот с тем же id заменяется.
+    
+    Args:
+        key: Ключ сообщества, которым помечаются его резюме и счетчики
+        tenant_bot: Бот сообщества
+        channel_id: Канал по умолчанию
+        routes: Таблица маршрутов резюме по каналам
+    """
+    tenant = Tenant(key, tenant_bot, channel_id, routes)
+    tenants[tenant_bot.id] = tenant
+    return tenant
+
+for tenant_config in load_tenant_configs(BOTS, DEFAULT_TENANT, BOT_TOKEN, CHANNEL_ID, CHANNEL_ROUTES):
+    add_tenant(
+        tenant_config["tenant"],
+        Bot(token=tenant_config["token"], session=http_session),
+        tenant_config["channel_id"] or CHANNEL_ID,
+        load_routes(tenant_config["channel_routes"])
+    )
+
+# Бот первого сообщества, для кода, которому нужен один бот
+bot = next(iter(tenants.values())).bot
+
+dp.update.outer_middleware(TenantMiddleware(tenants))
+
+# Извлечение текста из документов с резюме
+document_extractor = DocumentExtractor(EXTRACTION_WORKERS, EXTRACTION_MAX_PENDING, EXTRACTION_TIMEOUT_SECONDS)
+
+# Профилирование включается только при PROFILE_SAMPLE_RATE > 0, иначе не добавляет накладных расходов
+profiler = UpdateProfiler(PROFILE_SAMPLE_RATE, PROFILE_DIR, LOOP_LAG_THRESHOLD_MS) if PROFILE_SAMPLE_RATE > 0 else None
+
 # Создание таблиц при запуске
 async def init_db():
     try:
         # Проверяем, существуют ли таблицы
         async with engine.connect() as conn:
             # Проверяем наличие таблицы user_messages
-            from sqlalchemy import text
-            result = await conn.execute(text("SELECT EXISTS (SELECT FROM information_schema.tables WHERE table_name = 'user_messages')"))
-            exists = result.scalar()
+            exists = await table_exists(conn, UserMessage.__tablename__)
             
             if not exists:
                 logger.warning("Таблица user_messages не существует! Создаю таблицы...")
@@ -76,19 +143,25 @@ async def init_db():
                 logger.info("Таблицы созданы")
             else:
                 # Проверяем наличие колонки id
-                result = await conn.execute(text("SELECT EXISTS (SELECT FROM information_schema.columns WHERE table_name = 'user_messages' AND column_name = 'id')"))
-                has_id = result.scalar()
+                has_id = await column_exists(conn, UserMessage.__tablename__, "id")
                 
                 if not has_id:
                     logger.error("Структура базы данных устарела! Запустите скрипт миграции: python src/migrate_db.py")
                     raise Exception("Структура базы данных устарела")
                 
+                # Добавляем недостающие колонки (last_update, tenant)
+                await safe_migrate(engine)
+                
+                # Создаем недостающие вспомогательные таблицы (существующие не затрагиваются)
+                async with engine.begin() as conn:
+                    await conn.run_sync(Base.metadata.create_all)
+                
                 logger.info("База данных инициализирована")
     except Exception as e:
         logger.error(f"Ошибка при инициализации базы данных: {e}")
         raise
 
-async def send_to_queue(username: str, message: str) -> None:
+async def send_to_queue(username: str, message: str, tenant: Tenant) -> None:
     """
     Отправляет сообщение на проверку.
     В данной реализации проверка выполняется напрямую, без использования очереди.
@@ -96,14 +169,15 @@ async def send_to_queue(username: str, message: str) -> None:
     Args:
         username: Имя пользователя
         message: Текст сообщения для проверки
+        tenant: Сообщество, в которое отправлено резюме
     """
-    logger.info(f"Отправка сообщения пользователя {username} на проверку")
+    logger.info(f"Отправка сообщения пользователя {username} ({tenant.key}) на проверку")
     
     # Запускаем проверку сообщения асинхронно
-    asyncio.create_task(check_message_with_neural_net(username, message))
+    asyncio.create_task(check_message_with_neural_net(username, message, tenant))
 
 # Расширенная проверка сообщения
-async def check_message_with_neural_net(username: str, message: str) -> None:
+async def check_message_with_neural_net(username: str, message: str, tenant: Tenant) -> None:
     """
     Проверяет сообщение с помощью локальной проверки.
     Обновляет статус сообщения в базе данных и отправляет уведомление пользователю.
@@ -111,6 +185,7 @@ async def check_message_with_neural_net(username: str, message: str) -> None:
     Args:
         username: Имя пользователя
         message: Текст сообщения для проверки
+        tenant: Сообщество, в которое отправлено резюме
     """
     logger.info(f"Проверка сообщения пользователя {username}")
     
@@ -121,7 +196,7 @@ async def check_message_with_neural_net(username: str, message: str) -> None:
         async with async_session() as session:
             async with session.begin():
                 # Получаем сообщение пользователя из базы данных
-                stmt = select(UserMessage).where(UserMessage.username == username)
+                stmt = select(UserMessage).where(UserMessage.tenant == tenant.key, UserMessage.username == username)
                 result = await session.execute(stmt)
                 user_message = result.scalar_one_or_none()
                 
@@ -135,7 +210,9 @@ async def check_message_with_neural_net(username: str, message: str) -> None:
                     return
                 
                 # Обновляем статус сообщения
-                user_message.approved = 1 if is_approved else -1
+                new_status = 1 if is_approved else -1
+                await bump_counters(session, status_change(user_message.approved, new_status), tenant.key)
+                user_message.approved = new_status
                 user_message.check_result = check_result
                 
                 await session.commit()
@@ -150,13 +227,18 @@ async def check_message_with_neural_net(username: str, message: str) -> None:
             notification_text += "\n\nПожалуйста, исправьте указанные проблемы и отправьте резюме снова."
         
         try:
-            await bot.send_message(chat_id=f"@{username}", text=notification_text)
+            await tenant.bot.send_message(chat_id=f"@{username}", text=notification_text)
             logger.info(f"Уведомление отправлено пользователю {username}")
         except Exception as e:
             logger.error(f"Ошибка при отправке уведомления пользователю {username}: {e}")
             # Если не удалось отправить сообщение напрямую, сохраняем результат проверки
             # Пользователь сможет увидеть его через команду /status
             logger.info(f"Результат проверки сохранен в базе данных для пользователя {username}")
+        
+        # Одобренное резюме сразу отправляется в каналы, где интервал повторной отправки истек
+        # (для нового резюме - во все), дальше его повторяет send_due_messages
+        if is_approved:
+            asyncio.create_task(send_message_safely(username, tenant))
     
     except Exception as e:
         logger.error(f"Ошибка при проверке сообщения пользователя {username}: {e}")
@@ -164,65 +246,147 @@ async def check_message_with_neural_net(username: str, message: str) -> None:
         # В случае ошибки сохраняем информацию об ошибке в базе данных
         async with async_session() as session:
             async with session.begin():
-                stmt = select(UserMessage).where(UserMessage.username == username)
+                stmt = select(UserMessage).where(UserMessage.tenant == tenant.key, UserMessage.username == username)
                 result = await session.execute(stmt)
                 user_message = result.scalar_one_or_none()
                 
                 if user_message:
+                    await bump_counters(session, status_change(user_message.approved, -1), tenant.key)
                     user_message.approved = -1
                     user_message.check_result = f"❌ Произошла ошибка при проверке резюме: {str(e)}"
                     await session.commit()
 
-async def schedule_message_sending(username: str) -> None:
+def _delivery_upsert(dialect_name: str):
+    """INSERT ... ON CONFLICT для времени отправки резюме в канал."""
+    table = ChannelDelivery.__table__
+    insert = postgresql_insert if dialect_name == "postgresql" else sqlite_insert
+    stmt = insert(table)
+    return stmt.on_conflict_do_update(
+        index_elements=[table.c.user_message_id, table.c.channel_id],
+        set_={"last_sent": stmt.excluded.last_sent}
+    )
+
+async def schedule_message_sending(username: str, tenant: Tenant) -> None:
     """
-    Планирует отправку сообщения в канал.
-    Проверяет, одобрено ли сообщение, и если да, планирует его отправку.
+    Планирует отправку сообщения в каналы.
+    Проверяет, одобрено ли сообщение, определяет каналы по таблице маршрутов сообщества
+    и параллельно отправляет резюме в те каналы, где интервал повторной отправки истек.
     
     Args:
         username: Имя пользователя
+        tenant: Сообщество, чьим ботом и в чьи каналы отправляется резюме
     """
     logger.info(f"Планирование отправки сообщения для пользователя {username}")
     
+    async with async_session() as session:
+        # Получаем сообщение пользователя из базы данных
+        stmt = select(UserMessage).where(UserMessage.tenant == tenant.key, UserMessage.username == username)
+        result = await session.execute(stmt)
+        user_message = result.scalar_one_or_none()
+        
+        if not user_message:
+            logger.warning(f"Сообщение пользователя {username} не найдено в базе данных")
+            return
+        
+        # Проверяем, одобрено ли сообщение
+        if user_message.approved != 1:
+            logger.info(f"Сообщение пользователя {username} не одобрено, отправка не планируется")
+            return
+        
+        # Получаем время последней отправки в каждый канал
+        stmt = select(ChannelDelivery).where(ChannelDelivery.user_message_id == user_message.id)
+        result = await session.execute(stmt)
+        deliveries = {delivery.channel_id: delivery for delivery in result.scalars()}
+    
+    # Отбираем каналы, в которые резюме пора отправить повторно
+    current_time = datetime.now()
+    interval = timedelta(hours=MESSAGE_INTERVAL_HOURS)
+    channels = [
+        channel_id for channel_id in route_channels(user_message.message, tenant.routes, tenant.channel_id)
+        if channel_id not in deliveries
+        or deliveries[channel_id].last_sent is None
+        or current_time - deliveries[channel_id].last_sent >= interval
+    ]
+    
+    if not channels:
+        logger.info(f"Сообщение пользователя {username} было отправлено во все каналы менее {MESSAGE_INTERVAL_HOURS} часов назад, отправка не планируется")
+        return
+    
+    # Формируем сообщение для отправки в канал
+    channel_message = f"📝 Резюме от @{username}:\n\n{user_message.message}"
+    
+    async def send(channel_id: str) -> None:
+        await tenant.bot.send_message(chat_id=channel_id, text=channel_message)
+    
+    outcome = await fan_out(channels, send, FANOUT_CONCURRENCY, channel_pacer)
+    sent_channels = [channel_id for channel_id, error in outcome.items() if error is None]
+    logger.info(f"Сообщение пользователя {username} отправлено в каналы: {', '.join(sent_channels) or 'нет'}")
+    
+    if not sent_channels:
+        return
+    
+    # Обновляем время последней отправки
     async with async_session() as session:
         async with session.begin():
-            # Получаем сообщение пользователя из базы данных
-            stmt = select(UserMessage).where(UserMessage.username == username)
+            # Строка резюме блокируется до конца транзакции, чтобы правка не прошла между проверкой и записью
+            stmt = select(UserMessage).where(UserMessage.id == user_message.id).with_for_update()
             result = await session.execute(stmt)
-            user_message = result.scalar_one_or_none()
+            stored = result.scalar_one_or_none()
             
-            if not user_message:
-                logger.warning(f"Сообщение пользователя {username} не найдено в базе данных")
+            # Пока резюме ждало отправки, его могли изменить: отправленная старая версия не учитывается,
+            # чтобы новая версия не ждала интервала повторной отправки
+            if not stored or stored.message != user_message.message or stored.approved != 1:
+                logger.info(f"Резюме пользователя {username} изменилось во время отправки, время отправки не сохраняется")
                 return
             
-            # Проверяем, одобрено ли сообщение
-            if user_message.approved != 1:
-                logger.info(f"Сообщение пользователя {username} не одобрено, отправка не планируется")
-                return
-            
-            # Проверяем, когда сообщение было отправлено в последний раз
-            current_time = datetime.now()
+            await session.execute(_delivery_upsert(session.bind.dialect.name), [
+                {"user_message_id": user_message.id, "channel_id": channel_id, "last_sent": current_time}
+                for channel_id in sent_channels
+            ])
+            stored.last_sent = current_time
             
-            if user_message.last_sent:
-                time_since_last_sent = current_time - user_message.last_sent
-                hours_since_last_sent = time_since_last_sent.total_seconds() / 3600
-                
-                if hours_since_last_sent < MESSAGE_INTERVAL_HOURS:
-                    logger.info(f"Сообщение пользователя {username} было отправлено менее {MESSAGE_INTERVAL_HOURS} часов назад, отправка не планируется")
-                    return
-            
-            # Отправляем сообщение в канал
-            try:
-                # Формируем сообщение для отправки в канал
-                channel_message = f"📝 Резюме от @{username}:\n\n{user_message.message}"
-                
-                await bot.send_message(chat_id=CHANNEL_ID, text=channel_message)
-                logger.info(f"Сообщение пользователя {username} отправлено в канал")
-                
-                # Обновляем время последней отправки
-                user_message.last_sent = current_time
-                await session.commit()
-            except Exception as e:
-                logger.error(f"Ошибка при отправке сообщения пользователя {username} в канал: {e}")
+            await bump_counters(session, {reposts_key(current_time): 1}, tenant.key)
+
+# Резюме, которые сейчас отправляются в каналы: (сообщество, username)
+sending_in_progress = set()
+
+async def send_message_safely(username: str, tenant: Tenant) -> None:
+    """
+    Вызывает schedule_message_sending и записывает ошибки в лог, чтобы они не прерывали фоновые задачи.
+    Если резюме пользователя уже отправляется, повторная отправка пропускается:
+    оставшиеся каналы обработает следующий запуск send_due_messages.
+    """
+    key = (tenant.key, username)
+    if key in sending_in_progress:
+        logger.info(f"Резюме пользователя {username} ({tenant.key}) уже отправляется в каналы")
+        return
+    
+    sending_in_progress.add(key)
+    try:
+        await schedule_message_sending(username, tenant)
+    except Exception as e:
+        logger.error(f"Ошибка при отправке резюме пользователя {username} ({tenant.key}) в каналы: {e}")
+    finally:
+        sending_in_progress.discard(key)
+
+async def send_due_messages() -> None:
+    """
+    Периодическая задача: перебирает одобренные резюме каждого сообщества
+    и отправляет их в каналы, где истек интервал повторной отправки.
+    Какие каналы пора обновить, решает schedule_message_sending.
+    """
+    for tenant in list(tenants.values()):
+        async with async_session() as session:
+            stmt = (
+                select(UserMessage.username)
+                .where(UserMessage.tenant == tenant.key, UserMessage.approved == 1)
+                .order_by(UserMessage.id)
+            )
+            usernames = (await session.execute(stmt)).scalars().all()
+        
+        logger.info(f"Проверка отправки {len(usernames)} одобренных резюме сообщества {tenant.key}")
+        for username in usernames:
+            await send_message_safely(username, tenant)
 
 @dp.message(Command("start"))
 async def start_command(message: types.Message):
@@ -246,14 +410,14 @@ async def start_command(message: types.Message):
     await message.answer(welcome_text)
 
 @dp.message(Command("status"))
-async def status_command(message: types.Message):
+async def status_command(message: types.Message, tenant: Tenant):
     username = message.from_user.username or str(message.from_user.id)
     # Убираем символ @ из username, если он есть
     if username.startswith('@'):
         username = username[1:]
     
     async with async_session() as session:
-        stmt = select(UserMessage).where(UserMessage.username == username)
+        stmt = select(UserMessage).where(UserMessage.tenant == tenant.key, UserMessage.username == username)
         result = await session.execute(stmt)
         user_msg = result.scalar_one_or_none()
         
@@ -311,8 +475,29 @@ async def help_command(message: types.Message):
     
     await message.answer(help_text)
 
+@dp.message(Command("stats"))
+async def stats_command(message: types.Message, tenant: Tenant):
+    if message.from_user.id not in ADMIN_IDS:
+        return
+    
+    await message.answer(format_stats(tenant.key))
+
+@dp.message(Command("profile"))
+async def profile_command(message: types.Message):
+    if message.from_user.id not in ADMIN_IDS:
+        return
+    
+    if profiler is None:
+        await message.answer("ℹ️ Профилирование выключено. Задайте PROFILE_SAMPLE_RATE > 0 и перезапустите бота.")
+        return
+    
+    summary = profiler.summary()
+    paths = await profiler.dump()
+    files_text = "\n".join(paths) if paths else "нет данных"
+    await message.answer(f"📈 Профили сохранены\n\n{summary}\n\n📁 Файлы:\n{files_text}")
+
 @dp.message()
-async def process_message_handler(message: types.Message):
+async def process_message_handler(message: types.Message, tenant: Tenant):
     if message.text and message.text.startswith('/'):
         return
     
@@ -322,12 +507,32 @@ async def process_message_handler(message: types.Message):
     if username.startswith('@'):
         username = username[1:]
     
-    user_message = message.text
+    if message.document:
+        # Резюме прислано файлом: скачиваем и извлекаем текст, подпись добавляем к тексту
+        try:
+            document_text = await read_document(
+                message.bot, message.document, document_extractor,
+                MAX_DOCUMENT_SIZE_MB * 1024 * 1024, DOCUMENT_CHUNK_SIZE, MAX_RESUME_LENGTH
+            )
+        except DocumentError as e:
+            await message.answer(f"❌ Не удалось принять файл: {e}")
+            return
+        user_message = "\n\n".join(part for part in (message.caption, document_text) if part)
+    else:
+        user_message = message.text or message.caption
+    
+    if not user_message:
+        await message.answer("❌ Отправьте резюме текстом или файлом PDF, DOCX или TXT.")
+        return
     
     if len(user_message) <= 5:
         await message.answer("❌ Сообщение слишком короткое. Минимальная длина - 6 символов.")
         return
     
+    if len(user_message) > MAX_RESUME_LENGTH:
+        await message.answer(f"❌ Резюме слишком длинное. Максимальная длина - {MAX_RESUME_LENGTH} символов.")
+        return
+    
     # Проверяем наличие хэштега #резюме
     if "#резюме" not in user_message.lower():
         await message.answer(
@@ -355,7 +560,7 @@ async def process_message_handler(message: types.Message):
     async with async_session() as session:
         async with session.begin():
             # Проверяем, есть ли уже сообщение от этого пользователя
-            stmt = select(UserMessage).where(UserMessage.username == username)
+            stmt = select(UserMessage).where(UserMessage.tenant == tenant.key, UserMessage.username == username)
             result = await session.execute(stmt)
             existing = result.scalar_one_or_none()
             
@@ -365,25 +570,31 @@ async def process_message_handler(message: types.Message):
             if existing:
                 is_update = True
                 old_message = existing.message
+                deltas = status_change(existing.approved, 0)
                 existing.message = user_message
                 existing.approved = 0
-                existing.last_sent = None
                 existing.check_result = None
                 existing.last_update = current_time
-                logger.info(f"Обновлено существующее сообщение пользователя {username}. Старое: '{old_message}', Новое: '{user_message}'")
+                # Время отправки в каналы сохраняется: новая версия попадет в канал,
+                # когда истечет интервал повторной отправки, а не сразу после правки
+                logger.info(f"Обновлено существующее сообщение пользователя {username}. Старое: {summarize_text(old_message, LOG_BODY_PREVIEW)}, Новое: {summarize_text(user_message, LOG_BODY_PREVIEW)}")
             else:
                 new_message = UserMessage(
+                    tenant=tenant.key,
                     username=username,
                     message=user_message,
                     approved=0,
                     last_update=current_time
                 )
                 session.add(new_message)
-                logger.info(f"Создано новое сообщение от пользователя {username}: '{user_message}'")
+                deltas = status_change(None, 0)
+                logger.info(f"Создано новое сообщение от пользователя {username}: {summarize_text(user_message, LOG_BODY_PREVIEW)}")
             
+            deltas[submissions_key(current_time.date())] += 1
+            await bump_counters(session, deltas, tenant.key)
             await session.commit()
     
-    await send_to_queue(username, user_message)
+    await send_to_queue(username, user_message, tenant)
     
     if is_update:
         await message.answer(
@@ -404,15 +615,37 @@ async def main():
     # Инициализируем базу данных
     await init_db()
     
+    # Загружаем счетчики статистики и периодически сверяем их с базой
+    await reconcile_counters(async_session)
+    scheduler.add_job(
+        reconcile_counters, "interval", minutes=STATS_RECONCILE_MINUTES,
+        args=[async_session], id="reconcile_counters", replace_existing=True
+    )
+    
+    # Периодически отправляем одобренные резюме в каналы
+    scheduler.add_job(
+        send_due_messages, "interval", minutes=SEND_CHECK_MINUTES,
+        id="send_due_messages", replace_existing=True, next_run_time=datetime.now()
+    )
+    
     # Запускаем планировщик
     scheduler.start()
     
-    # Запускаем бота
-    await dp.start_polling(bot)
+    # Включаем профилирование; профили также сохраняются по сигналу SIGUSR2
+    if profiler is not None:
+        profiler.install(dp)
+        if hasattr(signal, "SIGUSR2"):
+            asyncio.get_running_loop().add_signal_handler(
+                signal.SIGUSR2, lambda: asyncio.create_task(profiler.dump())
+            )
+    
+    # Запускаем всех ботов в одном диспетчере
+    logger.info(f"Запуск ботов сообществ: {', '.join(tenant.key for tenant in tenants.values())}")
+    try:
+        await dp.start_polling(*(tenant.bot for tenant in tenants.values()))
+    finally:
+        document_extractor.shutdown()
+        logger.info(document_extractor.stats())
 
 if __name__ == "__main__":
-    logging.basicConfig(
-        level=logging.INFO,
-        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    )
     asyncio.run(main())
\ No newline at end of file
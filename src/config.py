@@ -1,3 +1,4 @@
+import json
 import os
 from dotenv import load_dotenv
 
@@ -7,18 +8,70 @@ load_dotenv()
 # Конфигурация бота
 BOT_TOKEN = os.getenv('BOT_TOKEN')
 CHANNEL_ID = os.getenv('CHANNEL_ID')
-DATABASE_URL = os.getenv('DATABASE_URL')
+# По умолчанию встроенная SQLite в режиме WAL; для PostgreSQL укажите postgresql+asyncpg://...
+DATABASE_URL = os.getenv('DATABASE_URL', 'sqlite+aiosqlite:///database.db')
+
+# Несколько ботов (сообществ) в одном процессе. JSON-список вида
+# [{"tenant": "backend", "token": "...", "channel_id": "@backend_jobs", "channel_routes": {"python": ["@py_jobs"]}}]
+# Боты используют общую базу данных и HTTP-сессию, данные разделены по ключу tenant.
+# Если не задан, запускается один бот из BOT_TOKEN, CHANNEL_ID и CHANNEL_ROUTES.
+BOTS = os.getenv('BOTS')
+
+# Маршрутизация резюме по каналам.
+# JSON вида {"python": ["@backend_jobs"], "навыки": ["@it_jobs"], "*": ["@all_jobs"]}:
+# ключ - раздел резюме (опыт, образование, навыки, контакты) или ключевое слово,
+# "*" - каналы для всех резюме. Если ни один маршрут не подошел, используется CHANNEL_ID.
+CHANNEL_ROUTES = os.getenv('CHANNEL_ROUTES')
+# Сколько каналов обслуживается одновременно при рассылке одного резюме
+FANOUT_CONCURRENCY = int(os.getenv('FANOUT_CONCURRENCY', 5))
+# Минимальный интервал между сообщениями в один канал (в секундах)
+CHANNEL_MIN_INTERVAL_SECONDS = float(os.getenv('CHANNEL_MIN_INTERVAL_SECONDS', 3))
 
 # Настройки проверки сообщений
 MIN_MESSAGE_LENGTH = 10
 FORBIDDEN_WORDS = ["спам", "реклама", "казино", "ставки", "букмекер"]
 SPAM_SYMBOLS = ["$$$", "!!!", "???", "###"]
 
+# Максимальная длина резюме: сообщение в Telegram ограничено 4096 символами,
+# часть занимает заголовок "Резюме от @username" при отправке в канал
+MAX_RESUME_LENGTH = int(os.getenv('MAX_RESUME_LENGTH', 4000))
+
+# Настройки приема резюме в виде документов (PDF, DOCX, TXT)
+MAX_DOCUMENT_SIZE_MB = int(os.getenv('MAX_DOCUMENT_SIZE_MB', 5))
+DOCUMENT_CHUNK_SIZE = 64 * 1024
+# Число процессов для извлечения текста и максимум документов, одновременно переданных в пул
+EXTRACTION_WORKERS = int(os.getenv('EXTRACTION_WORKERS', 2))
+EXTRACTION_MAX_PENDING = int(os.getenv('EXTRACTION_MAX_PENDING', 8))
+# Время на извлечение текста из одного документа; зависший процесс после него завершается
+EXTRACTION_TIMEOUT_SECONDS = float(os.getenv('EXTRACTION_TIMEOUT_SECONDS', 30))
+
 # Настройки планировщика
 MESSAGE_INTERVAL_HOURS = 8
+# Как часто искать одобренные резюме, которые пора отправить в каналы (в минутах)
+SEND_CHECK_MINUTES = int(os.getenv('SEND_CHECK_MINUTES', 10))
+
+# Как часто сверять счетчики /stats с таблицей user_messages (в минутах)
+STATS_RECONCILE_MINUTES = int(os.getenv('STATS_RECONCILE_MINUTES', 60))
 
 # Настройки логирования
-LOG_LEVEL = "INFO"
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+# Запись логов в отдельном потоке через очередь, чтобы не блокировать цикл событий
+LOG_ASYNC = os.getenv('LOG_ASYNC', '1') == '1'
+# Логи в формате JSON (по одной записи в строке)
+LOG_JSON = os.getenv('LOG_JSON', '0') == '1'
+# Доля записей ниже WARNING, которая попадает в лог, по логгерам: {"src.bot": 0.1}
+LOG_SAMPLING = json.loads(os.getenv('LOG_SAMPLING', '{}'))
+# Сколько первых символов резюме записывать в лог (0 - только длина и хэш)
+LOG_BODY_PREVIEW = int(os.getenv('LOG_BODY_PREVIEW', 60))
+
+# Администраторы бота (Telegram ID через запятую)
+ADMIN_IDS = {int(admin_id) for admin_id in os.getenv('ADMIN_IDS', '').split(',') if admin_id.strip()}
+
+# Настройки профилирования (0 - выключено, иначе доля профилируемых апдейтов от 0 до 1)
+PROFILE_SAMPLE_RATE = float(os.getenv('PROFILE_SAMPLE_RATE', 0))
+PROFILE_DIR = os.getenv('PROFILE_DIR', 'profiles')
+# Порог, после которого блокировка цикла событий записывается как медленный колбэк
+LOOP_LAG_THRESHOLD_MS = float(os.getenv('LOOP_LAG_THRESHOLD_MS', 100))
 
 # Настройки X.AI (Grok)
 GROK_API_URL = os.getenv('GROK_API_URL', 'https://api.x.ai/v1/chat/completions')
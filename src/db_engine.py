@@ -0,0 +1,81 @@
+import logging
+from sqlalchemy import event, inspect
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+logger = logging.getLogger(__name__)
+
+# Асинхронные драйверы для URL без явно указанного драйвера
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+}
+
+# Настройки SQLite для однонодовой установки: WAL позволяет читать во время записи,
+# synchronous=NORMAL в режиме WAL безопасен и заметно ускоряет коммиты
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": 5000,
+    "foreign_keys": "ON",
+    "cache_size": -20000,  # 20 МБ
+    "temp_store": "MEMORY",
+    "mmap_size": 268435456,  # 256 МБ
+}
+
+
+def to_async_url(url: str) -> str:
+    """
+    Подставляет асинхронный драйвер, если он не указан.
+    Например, sqlite:///database.db -> sqlite+aiosqlite:///database.db.
+    """
+    scheme, sep, rest = url.partition("://")
+    return f"{ASYNC_DRIVERS.get(scheme, scheme)}{sep}{rest}"
+
+
+def _pragma_setter(pragmas: dict):
+    def set_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+    return set_sqlite_pragmas
+
+
+def make_async_engine(url: str, sqlite_pragmas: dict = None, **kwargs):
+    """
+    Создает асинхронный движок SQLAlchemy.
+    Для файловой SQLite соединения держатся в пуле, и на каждом новом
+    соединении включается WAL и настраиваются прагмы.
+
+    Args:
+        sqlite_pragmas: Прагмы, заменяющие значения из SQLITE_PRAGMAS
+    """
+    url = to_async_url(url)
+    if url.startswith("sqlite") and ":memory:" not in url:
+        # По умолчанию aiosqlite работает без пула и открывает файл заново на каждую сессию
+        kwargs.setdefault("poolclass", AsyncAdaptedQueuePool)
+    engine = create_async_engine(url, **kwargs)
+    if engine.dialect.name == "sqlite":
+        event.listen(engine.sync_engine, "connect", _pragma_setter({**SQLITE_PRAGMAS, **(sqlite_pragmas or {})}))
+    return engine
+
+
+async def table_exists(conn, table_name: str) -> bool:
+    """Проверяет наличие таблицы через инспектор SQLAlchemy (работает с любой базой)."""
+    return await conn.run_sync(lambda sync_conn: inspect(sync_conn).has_table(table_name))
+
+
+async def column_exists(conn, table_name: str, column_name: str) -> bool:
+    """Проверяет наличие колонки в таблице через инспектор SQLAlchemy."""
+    def check(sync_conn) -> bool:
+        inspector = inspect(sync_conn)
+        if not inspector.has_table(table_name):
+            return False
+        return any(column["name"] == column_name for column in inspector.get_columns(table_name))
+
+    return await conn.run_sync(check)
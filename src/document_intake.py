@@ -0,0 +1,291 @@
+import asyncio
+import logging
+import os
+import tempfile
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from xml.etree import ElementTree
+
+logger = logging.getLogger(__name__)
+
+# Поддерживаемые форматы документов с резюме
+SUPPORTED_EXTENSIONS = (".pdf", ".docx", ".txt", ".md")
+
+WORD_NAMESPACE = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+# Предельный размер распакованного word/document.xml: архив в несколько сотен
+# килобайт может распаковаться в гигабайты текста
+MAX_DOCX_XML_BYTES = 10 * 1024 * 1024
+
+
+class DocumentError(Exception):
+    """Документ не удалось принять: слишком большой, неподдерживаемый или нечитаемый."""
+
+
+class DocumentTooLarge(DocumentError):
+    pass
+
+
+class DocumentUnreadable(DocumentError):
+    """
+    Документ не удалось разобрать. Текст ошибки парсера хранится в detail
+    для лога, а пользователю показывается общее сообщение.
+    """
+
+    def __init__(self, file_name: str, detail: str):
+        super().__init__(file_name, detail)
+        self.file_name = file_name
+        self.detail = detail
+
+    def __str__(self) -> str:
+        return f"Не удалось прочитать файл {self.file_name}: файл поврежден или сохранен в неподдерживаемом виде"
+
+
+def _too_long(max_chars: int) -> DocumentError:
+    return DocumentTooLarge(f"Текст резюме длиннее {max_chars} символов, сократите его")
+
+
+class _CappedWriter:
+    """Файловый объект, который прерывает скачивание при превышении лимита размера."""
+
+    def __init__(self, fh, max_bytes: int):
+        self.fh = fh
+        self.max_bytes = max_bytes
+        self.written = 0
+
+    def write(self, chunk: bytes) -> int:
+        self.written += len(chunk)
+        if self.written > self.max_bytes:
+            raise DocumentTooLarge(f"Файл больше {self.max_bytes // (1024 * 1024)} МБ")
+        return self.fh.write(chunk)
+
+    def flush(self) -> None:
+        self.fh.flush()
+
+
+def _extension(file_name: str) -> str:
+    return os.path.splitext(file_name or "")[1].lower()
+
+
+def _extract_docx(path: str, max_chars: int) -> str:
+    with zipfile.ZipFile(path) as archive:
+        if archive.getinfo("word/document.xml").file_size > MAX_DOCX_XML_BYTES:
+            raise DocumentTooLarge("Документ слишком большой после распаковки")
+        paragraphs = []
+        length = 0
+        # Документ разбирается потоково, разобранные абзацы сразу освобождаются
+        with archive.open("word/document.xml") as xml:
+            for _, element in ElementTree.iterparse(xml):
+                if element.tag != f"{WORD_NAMESPACE}p":
+                    continue
+                text = "".join(node.text or "" for node in element.iter(f"{WORD_NAMESPACE}t"))
+                element.clear()
+                if text:
+                    paragraphs.append(text)
+                    length += len(text) + 1
+                    if length > max_chars + 1:
+                        raise _too_long(max_chars)
+    return "\n".join(paragraphs)
+
+
+def _extract_pdf(path: str, max_chars: int) -> str:
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        raise DocumentError("Чтение PDF недоступно: не установлен пакет pypdf")
+    reader = PdfReader(path)
+    pages = []
+    length = 0
+    for page in reader.pages:
+        text = page.extract_text() or ""
+        pages.append(text)
+        length += len(text) + 1
+        if length > max_chars + 1:
+            raise _too_long(max_chars)
+    return "\n".join(pages)
+
+
+def _extract_plain(path: str, max_chars: int) -> str:
+    # В UTF-8 символ занимает не больше 4 байт, поэтому более длинный файл заведомо превышает лимит
+    with open(path, "rb") as fh:
+        data = fh.read(max_chars * 4 + 1)
+    if len(data) > max_chars * 4:
+        raise _too_long(max_chars)
+    for encoding in ("utf-8", "cp1251"):
+        try:
+            return data.decode(encoding)
+        except UnicodeDecodeError:
+            continue
+    return data.decode("utf-8", errors="replace")
+
+
+def extract_text(path: str, file_name: str, max_chars: int) -> str:
+    """
+    Извлекает текст из документа. Выполняется в дочернем процессе.
+    Разбор прекращается, как только текст превышает max_chars,
+    поэтому в основной процесс не передаются огромные строки.
+
+    Args:
+        path: Путь к скачанному файлу
+        file_name: Исходное имя файла (по нему определяется формат)
+        max_chars: Максимальная длина текста
+
+    Returns:
+        str: Текст документа без пробелов по краям
+    """
+    extension = _extension(file_name)
+    try:
+        if extension == ".docx":
+            text = _extract_docx(path, max_chars)
+        elif extension == ".pdf":
+            text = _extract_pdf(path, max_chars)
+        else:
+            text = _extract_plain(path, max_chars)
+        text = text.strip()
+        if len(text) > max_chars:
+            raise _too_long(max_chars)
+        return text
+    except DocumentError:
+        raise
+    except Exception as e:
+        # Лог пишет основной процесс: в дочернем процессе нет обработчиков логирования
+        raise DocumentUnreadable(file_name, f"{type(e).__name__}: {e}")
+
+
+async def download_document(bot, document, max_bytes: int, chunk_size: int) -> str:
+    """
+    Скачивает документ во временный файл частями, не держа его целиком в памяти.
+
+    Returns:
+        str: Путь к временному файлу (удаляет вызывающий код)
+    """
+    if document.file_size and document.file_size > max_bytes:
+        raise DocumentTooLarge(f"Файл больше {max_bytes // (1024 * 1024)} МБ")
+
+    fh = tempfile.NamedTemporaryFile(prefix="resume_", suffix=_extension(document.file_name), delete=False)
+    try:
+        with fh:
+            await bot.download(document, destination=_CappedWriter(fh, max_bytes), chunk_size=chunk_size, seek=False)
+    except DocumentError:
+        os.remove(fh.name)
+        raise
+    except Exception as e:
+        os.remove(fh.name)
+        logger.warning(f"Ошибка при скачивании файла {document.file_name}: {e}")
+        raise DocumentError("Не удалось скачать файл, попробуйте отправить его еще раз")
+    except BaseException:
+        os.remove(fh.name)
+        raise
+    return fh.name
+
+
+class DocumentExtractor:
+    """
+    Извлекает текст документов в ограниченном пуле процессов,
+    чтобы разбор PDF и DOCX не блокировал цикл событий.
+    Если извлечение не уложилось в timeout или пул сломался, процессы пула
+    завершаются и при следующем запросе создается новый пул.
+    """
+
+    def __init__(self, max_workers: int, max_pending: int, timeout: float):
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self._pool = None
+        # Ограничивает число задач в пуле, остальные ждут в цикле событий
+        self._slots = asyncio.Semaphore(max_pending)
+        self.busy = 0
+        self.completed = 0
+        self.failed = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._pool
+
+    def _discard_pool(self, pool: ProcessPoolExecutor) -> None:
+        """Завершает процессы пула: зависшую задачу ProcessPoolExecutor иначе не прервать."""
+        if self._pool is pool:
+            self._pool = None
+        # Другие документы, которые обрабатывались в этом пуле, получат BrokenProcessPool
+        for process in list((pool._processes or {}).values()):
+            process.terminate()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    async def extract(self, path: str, file_name: str, max_chars: int) -> str:
+        async with self._slots:
+            loop = asyncio.get_running_loop()
+            self.busy += 1
+            utilisation = min(self.busy, self.max_workers)
+            started = time.perf_counter()
+            pool = self._get_pool()
+            try:
+                return await asyncio.wait_for(
+                    loop.run_in_executor(pool, extract_text, path, file_name, max_chars), self.timeout
+                )
+            except DocumentUnreadable as e:
+                self.failed += 1
+                logger.warning(f"Не удалось разобрать {file_name}: {e.detail}")
+                raise
+            except DocumentError:
+                self.failed += 1
+                raise
+            except asyncio.TimeoutError:
+                self.failed += 1
+                logger.warning(f"Извлечение текста из {file_name} не уложилось в {self.timeout:.0f} с, пул перезапускается")
+                self._discard_pool(pool)
+                raise DocumentError("Файл обрабатывался слишком долго, попробуйте отправить другой формат")
+            except BrokenProcessPool:
+                self.failed += 1
+                logger.warning(f"Пул извлечения текста остановлен при обработке {file_name}, пул перезапускается")
+                self._discard_pool(pool)
+                raise DocumentError("Не удалось обработать файл, попробуйте отправить его еще раз")
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"Ошибка при извлечении текста из {file_name}: {e}")
+                raise DocumentError("Не удалось обработать файл, попробуйте отправить его еще раз")
+            finally:
+                latency = time.perf_counter() - started
+                self.busy -= 1
+                self.completed += 1
+                self.total_latency += latency
+                self.max_latency = max(self.max_latency, latency)
+                logger.info(
+                    f"Извлечение текста из {file_name}: {latency * 1000:.0f} мс, "
+                    f"загрузка пула {utilisation}/{self.max_workers}"
+                )
+
+    def stats(self) -> str:
+        average = self.total_latency / self.completed if self.completed else 0.0
+        return (
+            f"Извлечено документов: {self.completed} (ошибок {self.failed}), "
+            f"среднее время {average * 1000:.0f} мс, максимум {self.max_latency * 1000:.0f} мс, "
+            f"занято процессов {min(self.busy, self.max_workers)}/{self.max_workers}"
+        )
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+async def read_document(bot, document, extractor: DocumentExtractor, max_bytes: int, chunk_size: int,
+                        max_chars: int) -> str:
+    """
+    Скачивает документ с резюме и извлекает из него текст длиной не больше max_chars.
+
+    Raises:
+        DocumentError: Если формат не поддерживается, файл слишком большой или не читается,
+            а также при ошибке скачивания или превышении времени обработки
+    """
+    if _extension(document.file_name) not in SUPPORTED_EXTENSIONS:
+        raise DocumentError(f"Поддерживаются только файлы {', '.join(SUPPORTED_EXTENSIONS)}")
+
+    path = await download_document(bot, document, max_bytes, chunk_size)
+    try:
+        return await extractor.extract(path, document.file_name, max_chars)
+    finally:
+        os.remove(path)
@@ -0,0 +1,347 @@
+import argparse
+import asyncio
+import csv
+import gzip
+import json
+import logging
+import os
+import resource
+import sys
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import MetaData, Table, DateTime, Integer, Text, String, select, text
+
+# Добавляем родительскую директорию в sys.path для корректного импорта
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Пытаемся импортировать как модуль, если не получается - используем относительные пути
+try:
+    from src.models import Base
+    from src.config import DATABASE_URL
+    from src.db_engine import make_async_engine
+except ImportError:
+    from models import Base
+    from config import DATABASE_URL
+    from db_engine import make_async_engine
+
+logger = logging.getLogger(__name__)
+
+# Таблицы, которые можно выгружать и загружать
+TABLES = ("user_messages", "messages")
+FORMATS = ("jsonl", "csv")
+
+# Размер пачки строк для курсора и для вставки
+DEFAULT_BATCH_SIZE = 5000
+
+
+def open_file(path: str, mode: str, compress: bool = None):
+    """
+    Открывает файл выгрузки в текстовом режиме, при необходимости через gzip.
+    Если compress не указан, сжатие определяется по расширению .gz.
+    """
+    if compress is None:
+        compress = path.endswith(".gz")
+    if compress:
+        return gzip.open(path, mode + "t", encoding="utf-8", newline="")
+    return open(path, mode, encoding="utf-8", newline="")
+
+
+def detect_format(path: str) -> str:
+    """Определяет формат файла по расширению (file.jsonl, file.csv.gz и т.п.)."""
+    name = path[:-3] if path.endswith(".gz") else path
+    return "csv" if name.endswith(".csv") else "jsonl"
+
+
+async def reflect_table(conn, table_name: str) -> Table:
+    """Читает структуру таблицы из базы данных, не завися от диалекта."""
+    return await conn.run_sync(
+        lambda sync_conn: Table(table_name, MetaData(), autoload_with=sync_conn)
+    )
+
+
+def encode_value(value):
+    """Приводит значение колонки к виду, пригодному для JSON/CSV."""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def make_decoder(table: Table, from_csv: bool):
+    """
+    Возвращает функцию, которая приводит строку из файла к типам колонок таблицы.
+    В CSV пустая строка означает NULL для всех колонок, кроме обязательных текстовых.
+    """
+    converters = []
+    for column in table.columns:
+        if isinstance(column.type, DateTime):
+            convert = datetime.fromisoformat
+        elif isinstance(column.type, Integer):
+            convert = int
+        else:
+            convert = None
+        keep_empty = isinstance(column.type, (Text, String)) and not column.nullable
+        converters.append((column.name, convert, keep_empty))
+
+    def decode(row: dict) -> dict:
+        result = {}
+        for name, convert, keep_empty in converters:
+            if name not in row:
+                continue
+            value = row[name]
+            if value is None or (from_csv and value == "" and not keep_empty):
+                result[name] = None
+            elif convert is not None and isinstance(value, str):
+                result[name] = convert(value)
+            else:
+                result[name] = value
+        return result
+
+    return decode
+
+
+async def export_table(engine, table_name: str, path: str, fmt: str = None,
+                       compress: bool = None, batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+    """
+    Потоково выгружает таблицу в файл JSONL или CSV.
+    Строки читаются серверным курсором пачками по batch_size, поэтому
+    потребление памяти не зависит от размера таблицы.
+
+    Returns:
+        int: Количество выгруженных строк
+    """
+    fmt = fmt or detect_format(path)
+    count = 0
+
+    async with engine.connect() as conn:
+        table = await reflect_table(conn, table_name)
+        columns = [column.name for column in table.columns]
+        stmt = (
+            select(table)
+            .order_by(*table.primary_key.columns)
+            .execution_options(yield_per=batch_size)
+        )
+
+        with open_file(path, "w", compress) as fh:
+            writer = None
+            if fmt == "csv":
+                writer = csv.writer(fh)
+                writer.writerow(columns)
+
+            result = await conn.stream(stmt)
+            async for partition in result.partitions():
+                for row in partition:
+                    values = [encode_value(value) for value in row]
+                    if writer is not None:
+                        writer.writerow(["" if value is None else value for value in values])
+                    else:
+                        fh.write(json.dumps(dict(zip(columns, values)), ensure_ascii=False))
+                        fh.write("\n")
+                count += len(partition)
+                logger.debug(f"Выгружено {count} строк из {table_name}")
+
+    logger.info(f"Выгрузка {table_name} завершена: {count} строк в {path}")
+    return count
+
+
+def read_rows(fh, fmt: str):
+    """Построчно читает файл выгрузки, не загружая его целиком в память."""
+    if fmt == "csv":
+        yield from csv.DictReader(fh)
+    else:
+        for line in fh:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+async def _copy_batch(conn, table: Table, columns: list, batch: list) -> None:
+    """Загружает пачку строк через COPY (только PostgreSQL + asyncpg)."""
+    raw = await conn.get_raw_connection()
+    records = [tuple(row.get(name) for name in columns) for row in batch]
+    await raw.driver_connection.copy_records_to_table(
+        table.name, records=records, columns=columns
+    )
+
+
+async def _reset_sequence(conn, table: Table) -> None:
+    """Сдвигает последовательность первичного ключа PostgreSQL после загрузки id из файла."""
+    pk = list(table.primary_key.columns)
+    if len(pk) != 1 or not isinstance(pk[0].type, Integer):
+        return
+    await conn.execute(text(
+        f"SELECT setval(pg_get_serial_sequence('{table.name}', '{pk[0].name}'), "
+        f"COALESCE((SELECT MAX({pk[0].name}) FROM {table.name}), 1))"
+    ))
+
+
+async def import_table(engine, table_name: str, path: str, fmt: str = None,
+                       compress: bool = None, batch_size: int = DEFAULT_BATCH_SIZE,
+                       replace: bool = False) -> int:
+    """
+    Потоково загружает строки из файла JSONL или CSV в таблицу.
+    На PostgreSQL используется COPY, на остальных базах - пакетный executemany.
+    В памяти одновременно находится не больше batch_size строк.
+
+    Returns:
+        int: Количество загруженных строк
+    """
+    fmt = fmt or detect_format(path)
+    use_copy = engine.dialect.name == "postgresql" and engine.dialect.driver == "asyncpg"
+    count = 0
+
+    async with engine.begin() as conn:
+        table = await reflect_table(conn, table_name)
+        decode = make_decoder(table, from_csv=(fmt == "csv"))
+        columns = None
+
+        if replace:
+            logger.warning(f"Удаляю существующие строки из {table_name}")
+            await conn.execute(table.delete())
+
+        async def flush(batch):
+            if use_copy:
+                await _copy_batch(conn, table, columns, batch)
+            else:
+                await conn.execute(table.insert(), batch)
+
+        with open_file(path, "r", compress) as fh:
+            batch = []
+            for row in read_rows(fh, fmt):
+                row = decode(row)
+                if columns is None:
+                    columns = list(row.keys())
+                batch.append(row)
+                if len(batch) >= batch_size:
+                    await flush(batch)
+                    count += len(batch)
+                    batch = []
+                    logger.debug(f"Загружено {count} строк в {table_name}")
+            if batch:
+                await flush(batch)
+                count += len(batch)
+
+        if engine.dialect.name == "postgresql" and count:
+            await _reset_sequence(conn, table)
+
+    logger.info(f"Загрузка {table_name} завершена: {count} строк из {path}")
+    return count
+
+
+def generate_bench_file(path: str, rows: int) -> None:
+    """Создает файл JSONL с синтетическими резюме для бенчмарка."""
+    body = (
+        "#резюме Опыт работы: 5 лет backend-разработки в продуктовой компании. "
+        "Образование: высшее техническое, университет. Навыки: Python, SQL, Docker. "
+        "Контакты: email@example.com, telegram @user"
+    )
+    start = datetime(2024, 1, 1)
+    with open_file(path, "w") as fh:
+        for i in range(1, rows + 1):
+            created = (start + timedelta(seconds=i)).isoformat()
+            fh.write(json.dumps({
+                "id": i,
+                "username": f"bench_user_{i}",
+                "message": f"{body} #{i}",
+                "approved": i % 3 - 1,
+                "check_result": None,
+                "created_at": created,
+                "updated_at": created,
+                "last_sent": None,
+                "last_update": created,
+            }, ensure_ascii=False))
+            fh.write("\n")
+
+
+def peak_rss_mb() -> float:
+    """Пиковое потребление памяти процессом в мегабайтах."""
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return usage / 1024 if sys.platform != "darwin" else usage / (1024 * 1024)
+
+
+async def run_bench(url: str, rows: int, batch_size: int, workdir: str) -> None:
+    """
+    Замеряет пропускную способность загрузки и выгрузки user_messages.
+    Требует пустую таблицу user_messages (или пустую базу) и очищает ее после замера.
+    """
+    # Страницы файла SQLite, отображенные через mmap, попадают в RSS процесса
+    # и растут вместе с базой; без mmap пиковая память отражает саму выгрузку и загрузку
+    engine = make_async_engine(url, sqlite_pragmas={"mmap_size": 0})
+    source = os.path.join(workdir, "bench_source.jsonl")
+    target = os.path.join(workdir, "bench_export.jsonl.gz")
+
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+            existing = (await conn.execute(text("SELECT COUNT(*) FROM user_messages"))).scalar()
+        if existing:
+            raise RuntimeError("Таблица user_messages не пуста, бенчмарк остановлен")
+
+        print(f"Генерация {rows} строк...")
+        generate_bench_file(source, rows)
+        print(f"Пиковая память после генерации: {peak_rss_mb():.1f} МБ")
+
+        started = time.perf_counter()
+        imported = await import_table(engine, "user_messages", source, batch_size=batch_size)
+        elapsed = time.perf_counter() - started
+        print(f"Загрузка: {imported} строк за {elapsed:.2f} с ({imported / elapsed:,.0f} строк/с), "
+              f"пиковая память {peak_rss_mb():.1f} МБ")
+
+        started = time.perf_counter()
+        exported = await export_table(engine, "user_messages", target, batch_size=batch_size)
+        elapsed = time.perf_counter() - started
+        print(f"Выгрузка (jsonl.gz): {exported} строк за {elapsed:.2f} с ({exported / elapsed:,.0f} строк/с), "
+              f"файл {os.path.getsize(target) / 1024 / 1024:.1f} МБ, пиковая память {peak_rss_mb():.1f} МБ")
+    finally:
+        async with engine.begin() as conn:
+            await conn.execute(text("DELETE FROM user_messages WHERE username LIKE 'bench_user_%'"))
+        await engine.dispose()
+        for path in (source, target):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Потоковая выгрузка и загрузка таблиц user_messages и messages"
+    )
+    parser.add_argument("--url", default=DATABASE_URL, help="URL базы данных (по умолчанию DATABASE_URL)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    for name in ("export", "import"):
+        sub = subparsers.add_parser(name)
+        sub.add_argument("table", choices=TABLES)
+        sub.add_argument("path", help="Путь к файлу; расширение .gz включает сжатие")
+        sub.add_argument("--format", choices=FORMATS, help="По умолчанию определяется по расширению")
+        sub.add_argument("--gzip", action="store_true", default=None, help="Принудительно включить gzip")
+        if name == "import":
+            sub.add_argument("--replace", action="store_true", help="Удалить существующие строки перед загрузкой")
+
+    bench = subparsers.add_parser("bench", help="Бенчмарк загрузки и выгрузки")
+    bench.add_argument("--rows", type=int, default=1_000_000)
+    bench.add_argument("--workdir", default=".")
+
+    return parser
+
+
+async def main(argv=None) -> None:
+    args = build_parser().parse_args(argv)
+
+    if args.command == "bench":
+        await run_bench(args.url, args.rows, args.batch_size, args.workdir)
+        return
+
+    engine = make_async_engine(args.url)
+    try:
+        if args.command == "export":
+            await export_table(engine, args.table, args.path, args.format, args.gzip, args.batch_size)
+        else:
+            await import_table(engine, args.table, args.path, args.format, args.gzip,
+                               args.batch_size, args.replace)
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
@@ -0,0 +1,455 @@
+import argparse
+import asyncio
+import itertools
+import logging
+import os
+import random
+import sys
+import time
+from aiohttp import web
+from sqlalchemy import text
+
+# Добавляем родительскую директорию в sys.path для корректного импорта
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Фиктивный токен: все запросы уходят на локальный поддельный Bot API
+FAKE_TOKEN = "123456789:LOADTEST-fake-token"
+os.environ.setdefault("BOT_TOKEN", FAKE_TOKEN)
+
+from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+
+# Пытаемся импортировать как модуль, если не получается - используем относительные пути
+try:
+    from src import bot as bot_module
+    from src.logging_setup import setup_logging
+    from src.stats import load_counters
+except ImportError:
+    import bot as bot_module
+    from logging_setup import setup_logging
+    from stats import load_counters
+
+logger = logging.getLogger(__name__)
+
+# Префикс пользователей нагрузочного теста, по нему данные удаляются после прогона
+USERNAME_PREFIX = "lt_"
+
+DEFAULT_MIX = "submit=0.4,edit=0.2,status=0.3,spam=0.1"
+
+RESUME_TEMPLATE = (
+    "#резюме\n\n"
+    "Опыт работы: {years} лет разработки в компании, проект платежной системы.\n"
+    "Образование: окончил университет по специальности прикладная математика.\n"
+    "Навыки: владею Python, SQL, Docker, использую asyncio и PostgreSQL в работе.\n"
+    "Контакты: email {username}@example.com, телеграм @{username}. Версия {version}"
+)
+
+SPAM_MESSAGES = [
+    "привет",
+    "Лучшее казино и ставки!!! Пиши в личку $$$",
+    "Ищу работу, возьмите пожалуйста, очень нужно",
+]
+
+
+class FakeBotAPI:
+    """
+    Локальный поддельный Telegram Bot API.
+    Отвечает на любой метод успешным ответом с настраиваемой задержкой.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 8081, latency_ms: float = 0):
+        self.host = host
+        self.port = port
+        self.latency = latency_ms / 1000
+        self.requests = 0
+        self._message_ids = itertools.count(1)
+        self._runner = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    async def handle(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        method = request.match_info["method"].lower()
+        if method == "getme":
+            result = {"id": 123456789, "is_bot": True, "first_name": "LoadTest", "username": "load_test_bot"}
+        elif method == "sendmessage":
+            data = await request.post()
+            result = {
+                "message_id": next(self._message_ids),
+                "date": int(time.time()),
+                "chat": {"id": -1, "type": "private"},
+                "text": data.get("text", ""),
+            }
+        else:
+            result = True
+        return web.json_response({"ok": True, "result": result})
+
+    async def start(self) -> None:
+        app = web.Application()
+        app.router.add_post("/bot{token}/{method}", self.handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+
+    async def stop(self) -> None:
+        if self._runner:
+            await self._runner.cleanup()
+
+
+def parse_mix(value: str) -> dict:
+    """Разбирает строку вида 'submit=0.4,status=0.3' в словарь весов."""
+    mix = {}
+    for part in value.split(","):
+        kind, _, weight = part.partition("=")
+        kind = kind.strip()
+        if kind not in ("submit", "edit", "status", "spam"):
+            raise argparse.ArgumentTypeError(f"Неизвестный тип запроса: {kind}")
+        mix[kind] = float(weight)
+    return mix
+
+
+def percentile(values: list, p: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))
+    return values[index]
+
+
+class TrafficGenerator:
+    """Формирует сырые апдейты Telegram для заданной смеси запросов."""
+
+    def __init__(self, mix: dict, run_id: str):
+        self.kinds = list(mix.keys())
+        self.weights = list(mix.values())
+        self.run_id = run_id
+        self.users = []
+        self._user_ids = itertools.count(1)
+        self._update_ids = itertools.count(1)
+
+    def _new_user(self) -> tuple:
+        user_id = next(self._user_ids)
+        return user_id, f"{USERNAME_PREFIX}{self.run_id}_{user_id}"
+
+    def _update(self, user: tuple, message_text: str) -> dict:
+        user_id, username = user
+        return {
+            "update_id": next(self._update_ids),
+            "message": {
+                "message_id": next(self._update_ids),
+                "date": int(time.time()),
+                "chat": {"id": user_id, "type": "private"},
+                "from": {"id": user_id, "is_bot": False, "first_name": "Load", "username": username},
+                "text": message_text,
+            },
+        }
+
+    def next_update(self) -> tuple:
+        kind = random.choices(self.kinds, self.weights)[0]
+        if kind in ("edit", "status") and not self.users:
+            kind = "submit"
+
+        if kind == "submit":
+            user = self._new_user()
+            self.users.append(user)
+        elif kind in ("edit", "status"):
+            user = random.choice(self.users)
+        else:
+            user = self._new_user()
+
+        if kind in ("submit", "edit"):
+            message_text = RESUME_TEMPLATE.format(
+                years=random.randint(1, 15), username=user[1], version=random.random()
+            )
+        elif kind == "status":
+            message_text = "/status"
+        else:
+            message_text = random.choice(SPAM_MESSAGES)
+
+        return kind, self._update(user, message_text)
+
+
+def pool_stats() -> dict:
+    """Снимок состояния пула соединений движка бота."""
+    pool = bot_module.engine.pool
+    stats = {}
+    for name in ("size", "checkedout", "overflow"):
+        method = getattr(pool, name, None)
+        stats[name] = method() if callable(method) else None
+    return stats
+
+
+def verification_backlog() -> int:
+    """Количество проверок резюме, запущенных, но еще не завершенных."""
+    return sum(
+        1 for task in asyncio.all_tasks()
+        if not task.done() and getattr(task.get_coro(), "__name__", "") == "check_message_with_neural_net"
+    )
+
+
+async def run_load(bot: Bot, rate: float, duration: float, mix: dict,
+                   interval: float = 1.0, quiet: bool = False) -> dict:
+    """
+    Прогоняет открытую (Пуассоновскую) нагрузку с частотой rate запросов в секунду
+    через настоящий Dispatcher и возвращает сводку.
+    """
+    run_id = f"{int(time.time())}{random.randint(100, 999)}"
+    generator = TrafficGenerator(mix, run_id)
+    window = []
+    all_latencies = []
+    errors = 0
+    in_flight = set()
+    timeline = []
+    peak_checkedout = 0
+
+    async def handle(kind: str, update: dict) -> None:
+        nonlocal errors
+        started = time.perf_counter()
+        try:
+            await bot_module.dp.feed_raw_update(bot, update)
+        except Exception as e:
+            errors += 1
+            logger.debug(f"Ошибка обработки {kind}: {e}")
+        latency = (time.perf_counter() - started) * 1000
+        window.append(latency)
+        all_latencies.append(latency)
+
+    async def report() -> None:
+        nonlocal peak_checkedout
+        while True:
+            await asyncio.sleep(interval)
+            latencies = window.copy()
+            window.clear()
+            pool = pool_stats()
+            peak_checkedout = max(peak_checkedout, pool["checkedout"] or 0)
+            point = {
+                "t": round(time.perf_counter() - started, 1),
+                "throughput": len(latencies) / interval,
+                "p50": percentile(latencies, 50),
+                "p95": percentile(latencies, 95),
+                "p99": percentile(latencies, 99),
+                "in_flight": len(in_flight),
+                "pool": pool,
+                "backlog": verification_backlog(),
+            }
+            timeline.append(point)
+            if not quiet:
+                print(
+                    f"t={point['t']:>6}s  rps={point['throughput']:>7.1f}  "
+                    f"p50={point['p50']:>7.1f}ms  p95={point['p95']:>7.1f}ms  p99={point['p99']:>7.1f}ms  "
+                    f"in_flight={point['in_flight']:>4}  pool={pool['checkedout']}/{pool['size']}+{pool['overflow']}  "
+                    f"backlog={point['backlog']}"
+                )
+
+    started = time.perf_counter()
+    reporter = asyncio.create_task(report())
+    sent = 0
+    next_arrival = started
+
+    while next_arrival - started < duration:
+        delay = next_arrival - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        kind, update = generator.next_update()
+        task = asyncio.create_task(handle(kind, update))
+        in_flight.add(task)
+        task.add_done_callback(in_flight.discard)
+        sent += 1
+        next_arrival += random.expovariate(rate)
+
+    if in_flight:
+        await asyncio.wait(in_flight)
+    elapsed = time.perf_counter() - started
+    reporter.cancel()
+
+    # Ждем завершения фоновых проверок, чтобы не смешивать их со следующим прогоном
+    backlog_at_end = verification_backlog()
+    pending = [
+        task for task in asyncio.all_tasks()
+        if getattr(task.get_coro(), "__name__", "") == "check_message_with_neural_net"
+    ]
+    if pending:
+        await asyncio.wait(pending, timeout=60)
+
+    # Отправки одобренных резюме в каналы ограничены частотой на канал
+    # и не успевают завершиться за прогон, поэтому они отменяются
+    channel_sends = [
+        task for task in asyncio.all_tasks()
+        if getattr(task.get_coro(), "__name__", "") == "send_message_safely"
+    ]
+    for task in channel_sends:
+        task.cancel()
+    await asyncio.gather(*channel_sends, return_exceptions=True)
+
+    return {
+        "offered_rate": rate,
+        "sent": sent,
+        "throughput": len(all_latencies) / elapsed,
+        "p50": percentile(all_latencies, 50),
+        "p95": percentile(all_latencies, 95),
+        "p99": percentile(all_latencies, 99),
+        "errors": errors,
+        "peak_pool_checkedout": peak_checkedout,
+        "backlog_at_end": backlog_at_end,
+        "cancelled_channel_sends": len(channel_sends),
+        "timeline": timeline,
+    }
+
+
+def print_summary(summary: dict) -> None:
+    print(
+        f"\nИтог: предложено {summary['offered_rate']:.1f} rps, обработано {summary['throughput']:.1f} rps, "
+        f"запросов {summary['sent']}, ошибок {summary['errors']}\n"
+        f"Задержка: p50={summary['p50']:.1f}ms p95={summary['p95']:.1f}ms p99={summary['p99']:.1f}ms\n"
+        f"Пик занятых соединений пула: {summary['peak_pool_checkedout']}, "
+        f"очередь проверок в конце: {summary['backlog_at_end']}, "
+        f"отменено отправок в каналы: {summary['cancelled_channel_sends']}"
+    )
+
+
+def is_saturated(summary: dict, slo_p99_ms: float) -> bool:
+    """Конфигурация считается насыщенной, если нарушен SLO по p99, пропускная способность отстает или растут ошибки."""
+    return (
+        summary["p99"] > slo_p99_ms
+        or summary["throughput"] < 0.9 * summary["offered_rate"]
+        or summary["errors"] > 0.01 * max(summary["sent"], 1)
+    )
+
+
+async def find_saturation(bot: Bot, args, counters_snapshot: dict) -> None:
+    """Увеличивает частоту запросов, пока конфигурация не перестанет укладываться в SLO."""
+    rate = args.rate
+    last_good = None
+    while rate <= args.max_rate:
+        print(f"\n=== Частота {rate:.1f} rps ===")
+        try:
+            summary = await run_load(bot, rate, args.duration, args.mix, args.interval, quiet=args.quiet)
+            print_summary(summary)
+        finally:
+            # Каждый шаг начинается с базы в исходном состоянии
+            await cleanup(counters_snapshot)
+        if is_saturated(summary, args.slo_p99_ms):
+            break
+        last_good = rate
+        rate *= args.step
+
+    if last_good is None:
+        print(f"\nКонфигурация не укладывается в SLO p99 <= {args.slo_p99_ms}ms уже на {args.rate:.1f} rps")
+    else:
+        print(f"\nТочка насыщения: ~{last_good:.1f} rps (следующий шаг {rate:.1f} rps нарушил SLO p99 <= {args.slo_p99_ms}ms)")
+
+
+async def snapshot_counters() -> dict:
+    """Запоминает счетчики /stats до прогона, чтобы вернуть их после удаления данных теста."""
+    async with bot_module.engine.connect() as conn:
+        return dict((await conn.execute(text("SELECT key, value FROM stat_counters"))).all())
+
+
+async def cleanup(counters_snapshot: dict) -> None:
+    """
+    Удаляет данные пользователей нагрузочного теста и возвращает счетчики /stats
+    к состоянию до прогона. Изменения счетчиков, сделанные за время прогона
+    другими процессами, тоже откатываются, поэтому тест запускается на отдельной базе.
+    """
+    # Если прогон прервался, его фоновые проверки и отправки не должны писать в базу после очистки
+    background = [
+        task for task in asyncio.all_tasks()
+        if getattr(task.get_coro(), "__name__", "") in ("check_message_with_neural_net", "send_message_safely")
+    ]
+    for task in background:
+        task.cancel()
+    await asyncio.gather(*background, return_exceptions=True)
+
+    async with bot_module.engine.begin() as conn:
+        await conn.execute(
+            text("DELETE FROM user_messages WHERE username LIKE :prefix"),
+            {"prefix": f"{USERNAME_PREFIX}%"},
+        )
+        # Отправки в каналы, оставшиеся от удаленных резюме
+        await conn.execute(text(
+            "DELETE FROM channel_deliveries WHERE user_message_id NOT IN (SELECT id FROM user_messages)"
+        ))
+        await conn.execute(text("DELETE FROM stat_counters"))
+        if counters_snapshot:
+            await conn.execute(
+                text("INSERT INTO stat_counters (key, value) VALUES (:key, :value)"),
+                [{"key": key, "value": value} for key, value in counters_snapshot.items()],
+            )
+    await load_counters(bot_module.async_session)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Нагрузочный тест обработчиков бота")
+    parser.add_argument("--rate", type=float, default=20, help="Частота запросов в секунду (начальная для поиска насыщения)")
+    parser.add_argument("--duration", type=float, default=30, help="Длительность прогона в секундах")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix(DEFAULT_MIX), help=f"Смесь запросов, по умолчанию {DEFAULT_MIX}")
+    parser.add_argument("--interval", type=float, default=1.0, help="Интервал отчета в секундах")
+    parser.add_argument("--api-port", type=int, default=8081)
+    parser.add_argument("--api-latency-ms", type=float, default=30, help="Задержка ответа поддельного Bot API")
+    parser.add_argument("--find-saturation", action="store_true", help="Искать точку насыщения")
+    parser.add_argument("--max-rate", type=float, default=5000)
+    parser.add_argument("--step", type=float, default=1.5, help="Множитель частоты между шагами поиска")
+    parser.add_argument("--slo-p99-ms", type=float, default=500)
+    parser.add_argument("--keep-data", action="store_true", help="Не удалять данные после прогона")
+    parser.add_argument("--quiet", action="store_true", help="Не печатать поинтервальный отчет")
+    parser.add_argument(
+        "--log-mode", choices=("off", "sync", "queue"), default="off",
+        help="off - только предупреждения; sync - INFO с синхронной записью; queue - INFO через очередь (как в боте)"
+    )
+    parser.add_argument("--log-file", default="load_test.log", help="Куда писать логи бота в режимах sync и queue")
+    return parser
+
+
+async def main(argv=None) -> None:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.find_saturation and args.keep_data:
+        parser.error("--keep-data несовместим с --find-saturation: данные удаляются после каждого шага")
+
+    # Для сравнения задержек с разными способами логирования логи бота пишутся в файл
+    log_file = None
+    if args.log_mode == "off":
+        logging.getLogger().setLevel(logging.WARNING)
+    else:
+        log_file = open(args.log_file, "a", encoding="utf-8")
+        setup_logging("INFO", use_queue=(args.log_mode == "queue"), stream=log_file)
+
+    api = FakeBotAPI(port=args.api_port, latency_ms=args.api_latency_ms)
+    await api.start()
+
+    session = AiohttpSession(api=TelegramAPIServer.from_base(api.base_url))
+    bot = Bot(token=FAKE_TOKEN, session=session)
+    # Апдейты поддельного бота обрабатываются как апдейты первого сообщества,
+    # уведомления пользователям и отправка в канал тоже идут в поддельный API
+    tenant = next(iter(bot_module.tenants.values()))
+    bot_module.add_tenant(tenant.key, bot, tenant.channel_id, tenant.routes)
+
+    try:
+        await bot_module.init_db()
+        counters_snapshot = await snapshot_counters()
+        try:
+            if args.find_saturation:
+                await find_saturation(bot, args, counters_snapshot)
+            else:
+                summary = await run_load(bot, args.rate, args.duration, args.mix, args.interval, quiet=args.quiet)
+                print_summary(summary)
+        finally:
+            if not args.keep_data:
+                await cleanup(counters_snapshot)
+    finally:
+        await session.close()
+        await api.stop()
+        await bot_module.engine.dispose()
+        if log_file:
+            logging.shutdown()
+            log_file.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
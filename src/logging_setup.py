@@ -0,0 +1,115 @@
+import atexit
+import hashlib
+import json
+import logging
+import queue
+import random
+import sys
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
+
+
+class _DeferredFormatQueueHandler(QueueHandler):
+    """
+    QueueHandler, который не форматирует запись в потоке цикла событий.
+    В очередь кладется запись с уже подставленными аргументами сообщения,
+    а форматирование (время, JSON, трассировка исключения) выполняет поток QueueListener.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if record.args:
+            record.msg = record.getMessage()
+            record.args = None
+        return record
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Пропускает только долю записей ниже WARNING для выбранных логгеров.
+    Предупреждения и ошибки проходят всегда.
+
+    Args:
+        rates: Имя логгера (или префикс, например "src") -> доля записей от 0 до 1
+    """
+
+    def __init__(self, rates: dict[str, float]):
+        super().__init__()
+        # Более длинные префиксы проверяются первыми
+        self.rates = sorted(rates.items(), key=lambda item: len(item[0]), reverse=True)
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        for name, rate in self.rates:
+            if record.name == name or record.name.startswith(name + "."):
+                return random.random() < rate
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """Форматирует запись как одну строку JSON."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "time": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            data["exception"] = self.formatException(record.exc_info)
+        return json.dumps(data, ensure_ascii=False)
+
+
+def summarize_text(text: str, preview: int = 60) -> str:
+    """
+    Краткое представление текста резюме для логов: начало, длина и хэш.
+    По хэшу можно сопоставить записи об одном и том же тексте, не записывая его целиком.
+    """
+    if text is None:
+        return "<нет текста>"
+    digest = hashlib.sha1(text.encode("utf-8")).hexdigest()[:12]
+    if preview and len(text) > preview:
+        shown = text[:preview].replace("\n", " ") + "…"
+    elif preview:
+        shown = text.replace("\n", " ")
+    else:
+        return f"<{len(text)} симв., sha1:{digest}>"
+    return f"'{shown}' <{len(text)} симв., sha1:{digest}>"
+
+
+def setup_logging(level: str = "INFO", json_format: bool = False, sampling: dict = None,
+                  use_queue: bool = True, stream=None):
+    """
+    Настраивает корневой логгер, заменяя все ранее установленные обработчики.
+    При use_queue=True запись в поток и форматирование выполняются в отдельном
+    потоке QueueListener, а в цикле событий остается только постановка в очередь.
+
+    Returns:
+        QueueListener или None, если очередь не используется
+    """
+    handler = logging.StreamHandler(stream or sys.stderr)
+    if json_format:
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s"))
+
+    root = logging.getLogger()
+    for existing in root.handlers[:]:
+        root.removeHandler(existing)
+    root.setLevel(getattr(logging, level))
+
+    listener = None
+    if use_queue:
+        log_queue = queue.SimpleQueue()
+        front = _DeferredFormatQueueHandler(log_queue)
+        listener = QueueListener(log_queue, handler, respect_handler_level=True)
+        listener.start()
+        atexit.register(listener.stop)
+    else:
+        front = handler
+
+    if sampling:
+        front.addFilter(SamplingFilter(sampling))
+    root.addHandler(front)
+    return listener
@@ -1,15 +1,13 @@
 import asyncio
 import logging
-from sqlalchemy.ext.asyncio import create_async_engine
 from models import Base
 from config import DATABASE_URL
+from db_engine import make_async_engine, table_exists, column_exists
 
-# Настройка логирования
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Настройка базы данных
-engine = create_async_engine(DATABASE_URL)
+engine = make_async_engine(DATABASE_URL)
 
 async def migrate_db():
     """
@@ -43,16 +41,13 @@ async def check_db():
         # Получаем информацию о таблицах
         async with engine.connect() as conn:
             # Проверяем наличие таблицы user_messages
-            from sqlalchemy import text
-            result = await conn.execute(text("SELECT EXISTS (SELECT FROM information_schema.tables WHERE table_name = 'user_messages')"))
-            exists = result.scalar()
+            exists = await table_exists(conn, "user_messages")
             
             if exists:
                 logger.info("Таблица user_messages существует")
                 
                 # Проверяем наличие колонки id
-                result = await conn.execute(text("SELECT EXISTS (SELECT FROM information_schema.columns WHERE table_name = 'user_messages' AND column_name = 'id')"))
-                has_id = result.scalar()
+                has_id = await column_exists(conn, "user_messages", "id")
                 
                 if has_id:
                     logger.info("Колонка id существует в таблице user_messages")
@@ -69,6 +64,8 @@ async def check_db():
 if __name__ == "__main__":
     import sys
     
+    logging.basicConfig(level=logging.INFO)
+    
     if len(sys.argv) > 1 and sys.argv[1] == "--check":
         # Только проверка без миграции
         asyncio.run(check_db())
@@ -1,14 +1,19 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, Float
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, Float, UniqueConstraint
 from sqlalchemy.ext.declarative import declarative_base
 from datetime import datetime
 
 Base = declarative_base()
 
+# Сообщество (бот) по умолчанию: данные установок с одним ботом
+DEFAULT_TENANT = 'default'
+
 class UserMessage(Base):
     __tablename__ = 'user_messages'
+    __table_args__ = (UniqueConstraint('tenant', 'username', name='uq_user_messages_tenant_username'),)
     
     id = Column(Integer, primary_key=True)
-    username = Column(String(255), nullable=False, unique=True)
+    tenant = Column(String(64), nullable=False, default=DEFAULT_TENANT, server_default=DEFAULT_TENANT)  # Ключ сообщества (бота)
+    username = Column(String(255), nullable=False)
     message = Column(Text, nullable=False)
     approved = Column(Integer, default=0)  # 0 - на проверке, 1 - одобрено, -1 - отклонено
     check_result = Column(Text, nullable=True)
@@ -18,4 +23,25 @@ class UserMessage(Base):
     last_update = Column(DateTime, default=datetime.now)  # Время последнего обновления сообщения
     
     def __repr__(self):
-        return f"<UserMessage(username='{self.username}', approved={self.approved})>" 
\ No newline at end of file
+        return f"<UserMessage(tenant='{self.tenant}', username='{self.username}', approved={self.approved})>" 
+
+class ChannelDelivery(Base):
+    __tablename__ = 'channel_deliveries'
+    __table_args__ = (UniqueConstraint('user_message_id', 'channel_id'),)
+    
+    id = Column(Integer, primary_key=True)
+    user_message_id = Column(Integer, nullable=False, index=True)
+    channel_id = Column(String(255), nullable=False)
+    last_sent = Column(DateTime, nullable=True)  # Время последней отправки резюме в этот канал
+    
+    def __repr__(self):
+        return f"<ChannelDelivery(user_message_id={self.user_message_id}, channel_id='{self.channel_id}')>"
+
+class StatCounter(Base):
+    __tablename__ = 'stat_counters'
+    
+    key = Column(String(100), primary_key=True)  # Например: approved, submissions:2024-01-31, reposts:2024-01-31T08
+    value = Column(Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f"<StatCounter(key='{self.key}', value={self.value})>"
@@ -0,0 +1,252 @@
+import asyncio
+import cProfile
+import logging
+import os
+import pstats
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from aiogram import BaseMiddleware
+
+logger = logging.getLogger(__name__)
+
+# Ограничение глубины снимаемого стека (сохраняются самые глубокие кадры)
+MAX_STACK_DEPTH = 64
+
+
+def _frame_label(filename: str, line: int, name: str) -> str:
+    """Подпись функции в свернутом стеке: модуль:функция:строка."""
+    module = os.path.splitext(os.path.basename(filename))[0] if filename != "~" else "builtin"
+    return f"{module}:{name}:{line}".replace(";", ",").replace(" ", "_")
+
+
+def collapse_frame(frame) -> str:
+    """
+    Сворачивает стек потока в строку "f1;f2;f3" от внешнего вызова к текущему.
+    Исходный код не читается, поэтому снимок стека занимает микросекунды.
+    """
+    labels = []
+    while frame is not None and len(labels) < MAX_STACK_DEPTH:
+        labels.append(_frame_label(frame.f_code.co_filename, frame.f_lineno, frame.f_code.co_name))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+def write_collapsed(path: str, collapsed: dict) -> None:
+    """Записывает свернутые стеки в формате, который понимает flamegraph.pl и speedscope."""
+    with open(path, "w", encoding="utf-8") as fh:
+        for stack, value in sorted(collapsed.items()):
+            if value >= 1:
+                fh.write(f"{stack} {int(value)}\n")
+
+
+class LoopLagMonitor:
+    """
+    Следит за задержками цикла событий.
+    Корутина в цикле обновляет метку времени, а фоновый поток, заметив,
+    что метка не обновлялась дольше порога, снимает стек потока цикла -
+    так фиксируется именно тот колбэк, который блокирует цикл.
+    """
+
+    def __init__(self, threshold_ms: float, interval_ms: float = 50):
+        self.threshold = threshold_ms / 1000
+        self.interval = interval_ms / 1000
+        self.stacks = Counter()
+        self.slow_callbacks = 0
+        self.max_lag = 0.0
+        self._heartbeat = time.monotonic()
+        self._loop_thread_id = None
+        self._task = None
+        self._thread = None
+        self._stopped = threading.Event()
+
+    async def _beat(self) -> None:
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self.max_lag = max(self.max_lag, now - expected)
+            self._heartbeat = now
+
+    def _watch(self) -> None:
+        reported_beat = None
+        while not self._stopped.wait(self.interval):
+            beat = self._heartbeat
+            if time.monotonic() - beat < self.threshold + self.interval:
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            self.stacks[collapse_frame(frame)] += 1
+            if beat != reported_beat:
+                # Одна блокировка цикла считается один раз, даже если стек снят несколько раз
+                self.slow_callbacks += 1
+                reported_beat = beat
+                logger.warning(f"Цикл событий заблокирован дольше {self.threshold * 1000:.0f} мс: {frame.f_code.co_name} ({frame.f_code.co_filename}:{frame.f_lineno})")
+
+    def start(self) -> None:
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._task = asyncio.get_running_loop().create_task(self._beat())
+        self._thread = threading.Thread(target=self._watch, name="loop-lag-monitor", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._task:
+            self._task.cancel()
+
+
+class StackSampler:
+    """
+    Снимает стек потока цикла событий с фиксированным интервалом, пока идет
+    профилируемый апдейт. Из снимков строятся свернутые стеки для flamegraph:
+    значение стека - число снимков, то есть время, проведенное в нем.
+    Пока апдейт ждет ввода-вывода, в снимки попадает ожидание в select цикла.
+    """
+
+    def __init__(self, interval_ms: float = 5):
+        self.interval = interval_ms / 1000
+        self.stacks = Counter()
+        self.samples = 0
+        self._loop_thread_id = None
+        self._running = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            if not self._running.wait(0.5):
+                continue
+            time.sleep(self.interval)
+            if not self._running.is_set():
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is not None:
+                self.stacks[collapse_frame(frame)] += 1
+                self.samples += 1
+
+    def start(self) -> None:
+        self._loop_thread_id = threading.get_ident()
+        self._thread = threading.Thread(target=self._run, name="update-stack-sampler", daemon=True)
+        self._thread.start()
+
+    def resume(self) -> None:
+        self._running.set()
+
+    def pause(self) -> None:
+        self._running.clear()
+
+    def stop(self) -> None:
+        self._running.clear()
+        self._stopped.set()
+
+
+class ProfilingMiddleware(BaseMiddleware):
+    """
+    Профилирует случайную долю апдейтов с помощью cProfile.
+    Пока апдейт ожидает ввода-вывода, в профиль попадают и другие корутины цикла,
+    поэтому результаты стоит читать как профиль процесса под нагрузкой.
+    """
+
+    def __init__(self, profiler: "UpdateProfiler"):
+        self.profiler = profiler
+
+    async def __call__(self, handler, event, data):
+        if random.random() >= self.profiler.sample_rate or self.profiler.active:
+            return await handler(event, data)
+
+        profile = cProfile.Profile()
+        self.profiler.active = True
+        started = time.perf_counter()
+        self.profiler.sampler.resume()
+        profile.enable()
+        try:
+            return await handler(event, data)
+        finally:
+            profile.disable()
+            self.profiler.sampler.pause()
+            self.profiler.active = False
+            self.profiler.record(profile, time.perf_counter() - started)
+
+
+class UpdateProfiler:
+    """Собирает профили апдейтов и задержки цикла событий и выгружает их по запросу."""
+
+    def __init__(self, sample_rate: float, output_dir: str, lag_threshold_ms: float):
+        self.sample_rate = sample_rate
+        self.output_dir = output_dir
+        self.lag_monitor = LoopLagMonitor(lag_threshold_ms)
+        self.sampler = StackSampler()
+        self.active = False
+        self.sampled_updates = 0
+        self.sampled_seconds = 0.0
+        self._stats = None
+
+    def record(self, profile: cProfile.Profile, elapsed: float) -> None:
+        if self._stats is None:
+            self._stats = pstats.Stats(profile)
+        else:
+            self._stats.add(profile)
+        self.sampled_updates += 1
+        self.sampled_seconds += elapsed
+
+    def install(self, dp) -> None:
+        """Подключает профилирование к диспетчеру и запускает монитор цикла событий."""
+        dp.update.outer_middleware(ProfilingMiddleware(self))
+        self.lag_monitor.start()
+        self.sampler.start()
+        logger.info(f"Профилирование включено: доля апдейтов {self.sample_rate}, каталог {self.output_dir}")
+
+    async def dump(self) -> list[str]:
+        """
+        Сохраняет накопленные профили и сбрасывает их.
+        Накопленные данные забираются в цикле событий, а преобразование
+        и запись файлов выполняются в отдельном потоке.
+
+        Returns:
+            list[str]: Пути к созданным файлам
+        """
+        stats, self._stats = self._stats, None
+        update_stacks, self.sampler.stacks = self.sampler.stacks, Counter()
+        stacks, self.lag_monitor.stacks = self.lag_monitor.stacks, Counter()
+        summary = self.summary()
+        self.sampled_updates = 0
+        self.sampled_seconds = 0.0
+        self.sampler.samples = 0
+
+        paths = await asyncio.to_thread(self._write, stats, update_stacks, stacks)
+        logger.info(f"Профили сохранены: {', '.join(paths) or 'нет данных'}\n{summary}")
+        return paths
+
+    def _write(self, stats: pstats.Stats, update_stacks: Counter, stacks: Counter) -> list[str]:
+        os.makedirs(self.output_dir, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        paths = []
+
+        if stats is not None:
+            pstats_path = os.path.join(self.output_dir, f"updates-{stamp}.pstats")
+            stats.dump_stats(pstats_path)
+            paths.append(pstats_path)
+
+        if update_stacks:
+            collapsed_path = os.path.join(self.output_dir, f"updates-{stamp}.collapsed")
+            write_collapsed(collapsed_path, update_stacks)
+            paths.append(collapsed_path)
+
+        if stacks:
+            lag_path = os.path.join(self.output_dir, f"loop-lag-{stamp}.collapsed")
+            write_collapsed(lag_path, stacks)
+            paths.append(lag_path)
+
+        return paths
+
+    def summary(self) -> str:
+        return (
+            f"Профилировано апдейтов: {self.sampled_updates} ({self.sampled_seconds:.2f} с, снимков стека: {self.sampler.samples})\n"
+            f"Блокировок цикла событий: {self.lag_monitor.slow_callbacks}\n"
+            f"Максимальная задержка цикла: {self.lag_monitor.max_lag * 1000:.0f} мс"
+        )
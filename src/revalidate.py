@@ -0,0 +1,240 @@
+import argparse
+import asyncio
+import csv
+import json
+import logging
+import os
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from sqlalchemy import bindparam, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Добавляем родительскую директорию в sys.path для корректного импорта
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Пытаемся импортировать как модуль, если не получается - используем относительные пути
+try:
+    from src.models import UserMessage
+    from src.config import DATABASE_URL
+    from src.ai_checker import check_resume_locally
+    from src.db_engine import make_async_engine
+    from src.stats import bump_counters, status_change
+except ImportError:
+    from models import UserMessage
+    from config import DATABASE_URL
+    from ai_checker import check_resume_locally
+    from db_engine import make_async_engine
+    from stats import bump_counters, status_change
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHECKPOINT = ".revalidate_checkpoint.json"
+
+# Какие резюме перепроверять: на проверке (0) резюме и так будут проверены
+STATUS_FILTERS = {
+    "approved": (1,),
+    "rejected": (-1,),
+    "all": (1, -1),
+}
+
+
+def score_batch(messages: list[str]) -> list[tuple[int, str]]:
+    """
+    Проверяет пачку резюме текущими правилами. Выполняется в дочернем процессе.
+
+    Returns:
+        list[tuple[int, str]]: (статус 1/-1, результат проверки) для каждого резюме
+    """
+    results = []
+    for message in messages:
+        is_approved, check_result = check_resume_locally(message)
+        results.append((1 if is_approved else -1, check_result))
+    return results
+
+
+def new_checkpoint(status: str) -> dict:
+    return {"status": status, "last_id": 0, "checked": 0, "changed": 0}
+
+
+def load_checkpoint(path: str, status: str) -> dict:
+    """
+    Читает контрольную точку прерванного запуска.
+
+    Raises:
+        ValueError: Если прерванный запуск проверял резюме с другим статусом:
+            продолжение пропустило бы резюме с id меньше сохраненного
+    """
+    if not os.path.exists(path):
+        return new_checkpoint(status)
+    with open(path, encoding="utf-8") as fh:
+        checkpoint = json.load(fh)
+    if checkpoint.get("status") != status:
+        raise ValueError(
+            f"Контрольная точка {path} сохранена для --status {checkpoint.get('status')}, а не {status}. "
+            f"Продолжите с тем же --status или начните сначала с --restart"
+        )
+    return checkpoint
+
+
+def save_checkpoint(path: str, checkpoint: dict) -> None:
+    """Сохраняет контрольную точку атомарно, чтобы прерванный запуск не оставил поврежденный файл."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as fh:
+        json.dump(checkpoint, fh)
+    os.replace(tmp_path, path)
+
+
+async def score_page(pool: ProcessPoolExecutor, messages: list[str], batch_size: int) -> list[tuple[int, str]]:
+    """Делит страницу на пачки и проверяет их параллельно в пуле процессов."""
+    loop = asyncio.get_running_loop()
+    batches = [messages[i:i + batch_size] for i in range(0, len(messages), batch_size)]
+    results = await asyncio.gather(*(loop.run_in_executor(pool, score_batch, batch) for batch in batches))
+    return [verdict for batch in results for verdict in batch]
+
+
+async def revalidate(engine, status: str = "all", page_size: int = 5000, batch_size: int = 500,
+                     workers: int = None, dry_run: bool = False, checkpoint_path: str = DEFAULT_CHECKPOINT,
+                     restart: bool = False, report_path: str = None) -> dict:
+    """
+    Перепроверяет сохраненные резюме текущими правилами check_resume_locally.
+    Строки читаются страницами по id, изменившиеся вердикты записываются пакетным UPDATE.
+    После каждой страницы сохраняется контрольная точка, с которой можно продолжить.
+
+    Returns:
+        dict: Итоговая статистика (checked, changed и переходы статусов)
+    """
+    table = UserMessage.__table__
+    statuses = STATUS_FILTERS[status]
+
+    if dry_run or restart:
+        checkpoint = new_checkpoint(status)
+    else:
+        checkpoint = load_checkpoint(checkpoint_path, status)
+        if checkpoint["last_id"]:
+            logger.info(f"Продолжаю с id > {checkpoint['last_id']} (проверено ранее: {checkpoint['checked']})")
+
+    # Запись применяется, только если резюме не изменилось с момента чтения
+    update_stmt = (
+        update(table)
+        .where(table.c.id == bindparam("b_id"), table.c.message == bindparam("b_message"))
+        .values(approved=bindparam("b_approved"), check_result=bindparam("b_check_result"))
+    )
+
+    transitions = Counter()
+    report_file = open(report_path, "w", encoding="utf-8", newline="") if report_path else None
+    report = csv.writer(report_file) if report_file else None
+    if report:
+        report.writerow(["id", "tenant", "username", "old_approved", "new_approved", "old_check_result", "new_check_result"])
+
+    started = time.perf_counter()
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            while True:
+                async with engine.connect() as conn:
+                    stmt = (
+                        select(table.c.id, table.c.tenant, table.c.username, table.c.message, table.c.approved, table.c.check_result)
+                        .where(table.c.id > checkpoint["last_id"], table.c.approved.in_(statuses))
+                        .order_by(table.c.id)
+                        .limit(page_size)
+                    )
+                    rows = (await conn.execute(stmt)).all()
+
+                if not rows:
+                    break
+
+                verdicts = await score_page(pool, [row.message for row in rows], batch_size)
+
+                changes = []
+                deltas = {}
+                for row, (approved, check_result) in zip(rows, verdicts):
+                    if approved == row.approved and check_result == row.check_result:
+                        continue
+                    transitions[(row.approved, approved)] += 1
+                    if approved != row.approved:
+                        deltas.setdefault(row.tenant, Counter()).update(status_change(row.approved, approved))
+                    changes.append({
+                        "b_id": row.id,
+                        "b_message": row.message,
+                        "b_approved": approved,
+                        "b_check_result": check_result,
+                    })
+                    if report:
+                        report.writerow([row.id, row.tenant, row.username, row.approved, approved, row.check_result, check_result])
+
+                if changes and not dry_run:
+                    # Счетчики /stats меняются в той же транзакции; строки, пропущенные
+                    # из-за параллельного изменения резюме, исправит сверка счетчиков
+                    async with AsyncSession(engine) as session:
+                        async with session.begin():
+                            await session.execute(update_stmt, changes)
+                            for tenant, tenant_deltas in deltas.items():
+                                await bump_counters(session, tenant_deltas, tenant)
+
+                checkpoint["last_id"] = rows[-1].id
+                checkpoint["checked"] += len(rows)
+                checkpoint["changed"] += len(changes)
+                if not dry_run:
+                    save_checkpoint(checkpoint_path, checkpoint)
+
+                elapsed = time.perf_counter() - started
+                logger.info(
+                    f"Проверено {checkpoint['checked']} резюме, изменено {checkpoint['changed']} "
+                    f"({checkpoint['checked'] / elapsed:,.0f} резюме/с)"
+                )
+    finally:
+        if report_file:
+            report_file.close()
+
+    # Полный проход завершен, следующий запуск начнется сначала
+    if not dry_run and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+
+    return {
+        "checked": checkpoint["checked"],
+        "changed": checkpoint["changed"],
+        "elapsed": time.perf_counter() - started,
+        "transitions": transitions,
+    }
+
+
+def print_summary(summary: dict, dry_run: bool) -> None:
+    names = {1: "одобрено", -1: "отклонено"}
+    print(f"\n{'Пробный запуск (изменения не записаны)' if dry_run else 'Перепроверка завершена'}")
+    print(f"Проверено: {summary['checked']} за {summary['elapsed']:.1f} с, изменено: {summary['changed']}")
+    for (old, new), count in sorted(summary["transitions"].items()):
+        if old == new:
+            print(f"  {names[old]}: изменился только текст результата - {count}")
+        else:
+            print(f"  {names[old]} -> {names[new]}: {count}")
+
+
+async def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Перепроверка сохраненных резюме после изменения правил проверки")
+    parser.add_argument("--status", choices=STATUS_FILTERS, default="all", help="Какие резюме перепроверять")
+    parser.add_argument("--dry-run", action="store_true", help="Только показать изменения, не записывая их")
+    parser.add_argument("--report", help="CSV-файл с изменившимися вердиктами")
+    parser.add_argument("--page-size", type=int, default=5000)
+    parser.add_argument("--batch-size", type=int, default=500, help="Размер пачки для одного процесса")
+    parser.add_argument("--workers", type=int, default=None, help="Число процессов (по умолчанию по числу ядер)")
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT)
+    parser.add_argument("--restart", action="store_true", help="Начать сначала, игнорируя контрольную точку")
+    args = parser.parse_args(argv)
+
+    engine = make_async_engine(DATABASE_URL)
+    try:
+        summary = await revalidate(
+            engine, args.status, args.page_size, args.batch_size, args.workers,
+            args.dry_run, args.checkpoint, args.restart, args.report
+        )
+    except ValueError as e:
+        parser.error(str(e))
+    finally:
+        await engine.dispose()
+    print_summary(summary, args.dry_run)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
@@ -0,0 +1,187 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+import re
+import sys
+import time
+from contextlib import asynccontextmanager
+from functools import lru_cache
+
+# Добавляем родительскую директорию в sys.path для корректного импорта
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Пытаемся импортировать как модуль, если не получается - используем относительные пути
+try:
+    from src.ai_checker import detect_resume_sections
+except ImportError:
+    from ai_checker import detect_resume_sections
+
+logger = logging.getLogger(__name__)
+
+# Ключ маршрута, каналы которого получают все резюме
+ROUTE_ALL = "*"
+
+
+def load_routes(raw) -> dict[str, list[str]]:
+    """
+    Разбирает таблицу маршрутов из JSON.
+    Значение маршрута может быть строкой (один канал) или списком каналов.
+
+    Args:
+        raw: JSON-строка из переменной окружения CHANNEL_ROUTES или уже разобранный словарь
+
+    Returns:
+        dict[str, list[str]]: Ключ (раздел или ключевое слово в нижнем регистре) -> каналы
+    """
+    if not raw:
+        return {}
+    if isinstance(raw, str):
+        raw = json.loads(raw)
+
+    routes = {}
+    for key, channels in raw.items():
+        if isinstance(channels, str):
+            channels = [channels]
+        routes[key.lower()] = list(channels)
+    return routes
+
+
+@lru_cache(maxsize=None)
+def _keyword_pattern(keyword: str) -> re.Pattern:
+    """Ключевое слово целиком: "java" не совпадает с "javascript", "go" - с "google"."""
+    return re.compile(rf"(?<!\w){re.escape(keyword)}(?!\w)")
+
+
+def route_channels(message: str, routes: dict[str, list[str]], default_channel: str = None) -> list[str]:
+    """
+    Определяет каналы для резюме по найденным разделам и ключевым словам.
+    Ключевые слова ищутся целыми словами, без учета регистра.
+
+    Args:
+        message: Текст резюме
+        routes: Таблица маршрутов из load_routes
+        default_channel: Канал, если ни один маршрут не подошел
+
+    Returns:
+        list[str]: Каналы без повторов, в порядке таблицы маршрутов
+    """
+    message_lower = message.lower()
+    sections = detect_resume_sections(message_lower)
+
+    channels = []
+    matched = False
+    for key, route in routes.items():
+        if key == ROUTE_ALL:
+            channels.extend(route)
+        elif key in sections or _keyword_pattern(key).search(message_lower):
+            channels.extend(route)
+            matched = True
+
+    if not matched and default_channel:
+        channels.append(default_channel)
+
+    return list(dict.fromkeys(channels))
+
+
+class ChannelPacer:
+    """
+    Выдерживает минимальный интервал между сообщениями в каждый канал.
+    Разные каналы не ждут друг друга.
+    """
+
+    def __init__(self, min_interval: float):
+        self.min_interval = min_interval
+        self._locks = {}
+        self._last_sent = {}
+
+    @asynccontextmanager
+    async def slot(self, channel_id: str):
+        lock = self._locks.setdefault(channel_id, asyncio.Lock())
+        async with lock:
+            last_sent = self._last_sent.get(channel_id)
+            if last_sent is not None:
+                delay = last_sent + self.min_interval - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            try:
+                yield
+            finally:
+                self._last_sent[channel_id] = time.monotonic()
+
+
+async def fan_out(channels: list[str], send, concurrency: int, pacer: ChannelPacer = None) -> dict:
+    """
+    Параллельно отправляет сообщение в несколько каналов.
+    Одновременно выполняется не больше concurrency отправок.
+
+    Args:
+        channels: Каналы для отправки
+        send: Корутина-функция send(channel_id), выполняющая отправку
+        concurrency: Ограничение числа одновременных отправок
+        pacer: Ограничитель частоты отправки в каждый канал
+
+    Returns:
+        dict: Канал -> None при успехе или исключение при ошибке
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def send_one(channel_id: str):
+        if pacer is None:
+            async with semaphore:
+                return await send(channel_id)
+        # Ожидание паузы канала не занимает место в семафоре
+        async with pacer.slot(channel_id):
+            async with semaphore:
+                return await send(channel_id)
+
+    results = await asyncio.gather(
+        *(send_one(channel_id) for channel_id in channels), return_exceptions=True
+    )
+
+    outcome = {}
+    for channel_id, result in zip(channels, results):
+        if isinstance(result, Exception):
+            logger.error(f"Ошибка при отправке в канал {channel_id}: {result}")
+            outcome[channel_id] = result
+        else:
+            outcome[channel_id] = None
+    return outcome
+
+
+async def run_bench(channels: int, latency_ms: float, concurrency: int, resumes: int) -> None:
+    """Сравнивает последовательную и параллельную рассылку с имитацией задержки Bot API."""
+    channel_ids = [f"@bench_channel_{i}" for i in range(channels)]
+
+    async def send(channel_id: str):
+        await asyncio.sleep(latency_ms / 1000)
+
+    started = time.perf_counter()
+    for _ in range(resumes):
+        for channel_id in channel_ids:
+            await send(channel_id)
+    sequential = time.perf_counter() - started
+
+    # Интервал паузы меньше задержки отправки, чтобы замерить именно параллелизм
+    pacer = ChannelPacer(min_interval=latency_ms / 2000)
+    started = time.perf_counter()
+    for _ in range(resumes):
+        await fan_out(channel_ids, send, concurrency, pacer)
+    parallel = time.perf_counter() - started
+
+    total = channels * resumes
+    print(f"Каналов: {channels}, резюме: {resumes}, задержка Bot API: {latency_ms:.0f} мс, параллелизм: {concurrency}")
+    print(f"Последовательно: {sequential:.2f} с ({total / sequential:.1f} отправок/с)")
+    print(f"Параллельно:     {parallel:.2f} с ({total / parallel:.1f} отправок/с), ускорение x{sequential / parallel:.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Бенчмарк параллельной рассылки резюме по каналам")
+    parser.add_argument("--channels", type=int, default=12)
+    parser.add_argument("--latency-ms", type=float, default=150)
+    parser.add_argument("--concurrency", type=int, default=12)
+    parser.add_argument("--resumes", type=int, default=10)
+    args = parser.parse_args()
+
+    asyncio.run(run_bench(args.channels, args.latency_ms, args.concurrency, args.resumes))
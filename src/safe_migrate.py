@@ -1,45 +1,103 @@
 import asyncio
 import logging
-from sqlalchemy import text
-from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy import inspect, text
 
 # Пытаемся импортировать как модуль, если не получается - используем относительные пути
 try:
     from src.config import DATABASE_URL
+    from src.models import UserMessage, DEFAULT_TENANT
+    from src.db_engine import make_async_engine, column_exists
 except ImportError:
     from config import DATABASE_URL
+    from models import UserMessage, DEFAULT_TENANT
+    from db_engine import make_async_engine, column_exists
 
-# Настройка логирования
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Настройка базы данных
-engine = create_async_engine(DATABASE_URL)
+async def _add_tenant_sqlite(conn):
+    """
+    SQLite не умеет удалять ограничение UNIQUE(username), поэтому таблица пересоздается
+    по текущей модели, а данные переносятся в нее без изменений.
+    """
+    old_columns = await conn.run_sync(
+        lambda sync_conn: [column["name"] for column in inspect(sync_conn).get_columns("user_messages")]
+    )
+    columns = ", ".join(name for name in old_columns if name in UserMessage.__table__.c)
+
+    await conn.execute(text("ALTER TABLE user_messages RENAME TO user_messages_old"))
+    await conn.run_sync(UserMessage.__table__.create)
+    await conn.execute(text(f"INSERT INTO user_messages ({columns}) SELECT {columns} FROM user_messages_old"))
+    await conn.execute(text("DROP TABLE user_messages_old"))
+
+async def _add_tenant(conn):
+    await conn.execute(text(
+        f"ALTER TABLE user_messages ADD COLUMN tenant VARCHAR(64) NOT NULL DEFAULT '{DEFAULT_TENANT}'"
+    ))
 
-async def safe_migrate():
+    # Имя пользователя теперь уникально только внутри сообщества
+    unique_constraints = await conn.run_sync(
+        lambda sync_conn: inspect(sync_conn).get_unique_constraints("user_messages")
+    )
+    for constraint in unique_constraints:
+        if constraint["column_names"] == ["username"] and constraint["name"]:
+            await conn.execute(text(f'ALTER TABLE user_messages DROP CONSTRAINT "{constraint["name"]}"'))
+    await conn.execute(text(
+        "ALTER TABLE user_messages ADD CONSTRAINT uq_user_messages_tenant_username UNIQUE (tenant, username)"
+    ))
+
+async def safe_migrate(engine=None):
     """
-    Безопасно добавляет новое поле last_update в таблицу user_messages без потери данных.
+    Безопасно добавляет новые поля в таблицу user_messages без потери данных:
+    last_update и tenant (ключ сообщества для нескольких ботов).
+
+    Args:
+        engine: Движок базы данных; если не передан, создается временный по DATABASE_URL
     """
+    own_engine = engine is None
+    if own_engine:
+        engine = make_async_engine(DATABASE_URL)
+
     try:
         logger.info("Начинаю безопасную миграцию базы данных...")
-        
+
         async with engine.begin() as conn:
             # Проверяем наличие колонки last_update
-            result = await conn.execute(text("SELECT EXISTS (SELECT FROM information_schema.columns WHERE table_name = 'user_messages' AND column_name = 'last_update')"))
-            has_last_update = result.scalar()
-            
+            has_last_update = await column_exists(conn, "user_messages", "last_update")
+
             if has_last_update:
                 logger.info("Колонка last_update уже существует в таблице user_messages")
             else:
                 logger.info("Добавляю колонку last_update в таблицу user_messages...")
-                # Добавляем колонку last_update с текущим временем в качестве значения по умолчанию
-                await conn.execute(text("ALTER TABLE user_messages ADD COLUMN last_update TIMESTAMP DEFAULT CURRENT_TIMESTAMP"))
+                if engine.dialect.name == "sqlite":
+                    # SQLite не разрешает CURRENT_TIMESTAMP по умолчанию в ADD COLUMN, заполняем отдельно
+                    await conn.execute(text("ALTER TABLE user_messages ADD COLUMN last_update TIMESTAMP"))
+                    await conn.execute(text("UPDATE user_messages SET last_update = CURRENT_TIMESTAMP"))
+                else:
+                    # Добавляем колонку last_update с текущим временем в качестве значения по умолчанию
+                    await conn.execute(text("ALTER TABLE user_messages ADD COLUMN last_update TIMESTAMP DEFAULT CURRENT_TIMESTAMP"))
                 logger.info("Колонка last_update успешно добавлена")
-        
+
+            # Проверяем наличие колонки tenant
+            has_tenant = await column_exists(conn, "user_messages", "tenant")
+
+            if has_tenant:
+                logger.info("Колонка tenant уже существует в таблице user_messages")
+            else:
+                logger.info(f"Добавляю колонку tenant в таблицу user_messages (существующие резюме получат '{DEFAULT_TENANT}')...")
+                if engine.dialect.name == "sqlite":
+                    await _add_tenant_sqlite(conn)
+                else:
+                    await _add_tenant(conn)
+                logger.info("Колонка tenant успешно добавлена")
+
         logger.info("Безопасная миграция базы данных успешно завершена!")
     except Exception as e:
         logger.error(f"Ошибка при безопасной миграции базы данных: {e}")
         raise
+    finally:
+        if own_engine:
+            await engine.dispose()
 
 if __name__ == "__main__":
-    asyncio.run(safe_migrate()) 
\ No newline at end of file
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(safe_migrate())
@@ -9,7 +9,6 @@ from .database import get_unsent_messages, mark_message_as_sent
 
 load_dotenv()
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 BOT_TOKEN = os.getenv('BOT_TOKEN')
@@ -0,0 +1,185 @@
+import logging
+import os
+import sys
+from collections import Counter
+from datetime import date, datetime, timedelta
+from sqlalchemy import delete, event, func, select, update
+from sqlalchemy.orm import Session
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+# Добавляем родительскую директорию в sys.path для корректного импорта
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Пытаемся импортировать как модуль, если не получается - используем относительные пути
+try:
+    from src.models import UserMessage, StatCounter, DEFAULT_TENANT
+    from src.config import MESSAGE_INTERVAL_HOURS
+except ImportError:
+    from models import UserMessage, StatCounter, DEFAULT_TENANT
+    from config import MESSAGE_INTERVAL_HOURS
+
+logger = logging.getLogger(__name__)
+
+# Счетчики статусов резюме по значению UserMessage.approved
+STATUS_KEYS = {0: "pending", 1: "approved", -1: "rejected"}
+
+# Сколько дней хранить посуточные счетчики
+COUNTERS_RETENTION_DAYS = 90
+
+# Копия таблицы stat_counters в памяти, изменяется только после успешного коммита
+counters = Counter()
+
+_PENDING_KEY = "stat_counter_deltas"
+
+
+def tenant_key(tenant: str, key: str) -> str:
+    """Ключ счетчика сообщества; у сообщества по умолчанию ключи без префикса."""
+    return key if tenant == DEFAULT_TENANT else f"{tenant}:{key}"
+
+
+def _is_status_key(key: str) -> bool:
+    return key.rsplit(":", 1)[-1] in STATUS_KEYS.values()
+
+
+def submissions_key(day: date) -> str:
+    return f"submissions:{day.isoformat()}"
+
+
+def reposts_key(moment: datetime) -> str:
+    """Ключ интервала повторной отправки, в который попадает момент времени."""
+    hour = moment.hour - moment.hour % MESSAGE_INTERVAL_HOURS
+    return f"reposts:{moment.date().isoformat()}T{hour:02d}"
+
+
+def status_change(old_status, new_status) -> dict:
+    """Изменения счетчиков при переходе резюме из одного статуса в другой (None - резюме не было)."""
+    deltas = Counter()
+    if old_status is not None:
+        deltas[STATUS_KEYS[old_status]] -= 1
+    deltas[STATUS_KEYS[new_status]] += 1
+    return deltas
+
+
+def _upsert(dialect_name: str):
+    table = StatCounter.__table__
+    insert = postgresql_insert if dialect_name == "postgresql" else sqlite_insert
+    stmt = insert(table)
+    return stmt.on_conflict_do_update(
+        index_elements=[table.c.key], set_={"value": table.c.value + stmt.excluded.value}
+    )
+
+
+async def bump_counters(session, deltas: dict, tenant: str = DEFAULT_TENANT) -> None:
+    """
+    Изменяет счетчики в текущей транзакции сессии.
+    Копия в памяти обновляется только после коммита этой транзакции.
+
+    Args:
+        session: AsyncSession с открытой транзакцией
+        deltas: Ключ счетчика -> изменение
+        tenant: Сообщество, к которому относятся счетчики
+    """
+    params = [
+        {"key": tenant_key(tenant, key), "value": delta}
+        for key, delta in sorted(deltas.items()) if delta
+    ]
+    if not params:
+        return
+
+    # Ключи отсортированы, чтобы параллельные транзакции блокировали строки в одном порядке
+    await session.execute(_upsert(session.bind.dialect.name), params)
+    session.sync_session.info.setdefault(_PENDING_KEY, Counter()).update(
+        {param["key"]: param["value"] for param in params}
+    )
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_committed(session) -> None:
+    deltas = session.info.pop(_PENDING_KEY, None)
+    if deltas:
+        counters.update(deltas)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back(session) -> None:
+    session.info.pop(_PENDING_KEY, None)
+
+
+async def load_counters(async_session) -> None:
+    """Загружает все счетчики из базы в память."""
+    async with async_session() as session:
+        result = await session.execute(select(StatCounter.key, StatCounter.value))
+        counters.clear()
+        counters.update(dict(result.all()))
+
+
+async def reconcile_counters(async_session) -> None:
+    """
+    Сверяет счетчики статусов с таблицей user_messages и перечитывает копию в памяти.
+    Исправляет расхождения после ручных изменений базы и массовых операций;
+    заодно удаляет устаревшие посуточные счетчики.
+    """
+    async with async_session() as session:
+        async with session.begin():
+            stmt = (
+                select(UserMessage.tenant, UserMessage.approved, func.count())
+                .group_by(UserMessage.tenant, UserMessage.approved)
+            )
+            actual = {
+                tenant_key(tenant, STATUS_KEYS[status]): count
+                for tenant, status, count in (await session.execute(stmt)).all()
+                if status in STATUS_KEYS
+            }
+            stored = dict((await session.execute(select(StatCounter.key, StatCounter.value))).all())
+
+            # Статусы без резюме обнуляются; у сообщества по умолчанию счетчики есть всегда
+            status_keys = set(actual) | {key for key in stored if _is_status_key(key)} | set(STATUS_KEYS.values())
+            missing = [{"key": key, "value": 0} for key in sorted(status_keys) if key not in stored]
+            if missing:
+                await session.execute(_upsert(session.bind.dialect.name), missing)
+            for key in sorted(status_keys):
+                await session.execute(
+                    update(StatCounter).where(StatCounter.key == key).values(value=actual.get(key, 0))
+                )
+
+            cutoff = (date.today() - timedelta(days=COUNTERS_RETENTION_DAYS)).isoformat()
+            expired = [
+                key for key in stored
+                if (":submissions:" in f":{key}" or ":reposts:" in f":{key}") and key.rsplit(":", 1)[-1][:10] < cutoff
+            ]
+            if expired:
+                await session.execute(delete(StatCounter).where(StatCounter.key.in_(expired)))
+
+    drift = {key: actual.get(key, 0) - counters.get(key, 0) for key in status_keys}
+    drift = {key: value for key, value in drift.items() if value}
+    if counters and drift:
+        logger.warning(f"Счетчики статусов расходились с базой и были исправлены: {drift}")
+
+    await load_counters(async_session)
+
+
+def format_stats(tenant: str = DEFAULT_TENANT, days: int = 7, intervals: int = 6) -> str:
+    """Формирует текст команды /stats сообщества из копии счетчиков в памяти."""
+    def value(key: str) -> int:
+        return counters[tenant_key(tenant, key)]
+
+    text = (
+        "📊 Статистика резюме\n\n"
+        f"⏳ На проверке: {value('pending')}\n"
+        f"✅ Одобрено: {value('approved')}\n"
+        f"❌ Отклонено: {value('rejected')}\n\n"
+        "📥 Отправлено резюме по дням:\n"
+    )
+    today = date.today()
+    for offset in range(days):
+        day = today - timedelta(days=offset)
+        text += f"{day.strftime('%d.%m.%Y')}: {value(submissions_key(day))}\n"
+
+    text += f"\n🔁 Повторные отправки по интервалам ({MESSAGE_INTERVAL_HOURS} ч):\n"
+    now = datetime.now()
+    for offset in range(intervals):
+        moment = now - timedelta(hours=MESSAGE_INTERVAL_HOURS * offset)
+        hour = moment.hour - moment.hour % MESSAGE_INTERVAL_HOURS
+        text += f"{moment.strftime('%d.%m.%Y')} {hour:02d}:00: {value(reposts_key(moment))}\n"
+    return text
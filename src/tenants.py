@@ -0,0 +1,82 @@
+import json
+import logging
+from aiogram import BaseMiddleware
+from aiogram.utils.token import extract_bot_id
+
+logger = logging.getLogger(__name__)
+
+
+class Tenant:
+    """
+    Сообщество, обслуживаемое одним ботом: свой токен, канал и таблица маршрутов.
+    Движок базы данных, проверка резюме и HTTP-сессия общие для всех сообществ.
+    """
+
+    def __init__(self, key: str, bot, channel_id: str, routes: dict):
+        self.key = key
+        self.bot = bot
+        self.channel_id = channel_id
+        self.routes = routes
+
+    def __repr__(self):
+        return f"<Tenant(key='{self.key}', channel_id='{self.channel_id}')>"
+
+
+def load_tenant_configs(raw: str, default_key: str, default_token: str,
+                        default_channel: str, default_routes) -> list[dict]:
+    """
+    Разбирает список ботов из JSON.
+    Если список не задан, возвращает один бот из BOT_TOKEN, CHANNEL_ID и CHANNEL_ROUTES.
+
+    Args:
+        raw: JSON-список [{"tenant": ..., "token": ..., "channel_id": ..., "channel_routes": {...}}]
+
+    Returns:
+        list[dict]: Настройки ботов с ключами tenant, token, channel_id, channel_routes
+
+    Raises:
+        ValueError: Если сообщество или бот (id из токена) указаны несколько раз
+    """
+    if not raw:
+        return [{
+            "tenant": default_key,
+            "token": default_token,
+            "channel_id": default_channel,
+            "channel_routes": default_routes,
+        }]
+
+    configs = []
+    seen = set()
+    # Сообщества хранятся по id бота, поэтому один бот не может обслуживать два сообщества
+    bot_tenants = {}
+    for item in json.loads(raw):
+        key = item["tenant"]
+        if key in seen:
+            raise ValueError(f"Сообщество {key} указано в BOTS несколько раз")
+        seen.add(key)
+        bot_id = extract_bot_id(item["token"])
+        if bot_id in bot_tenants:
+            raise ValueError(f"Бот {bot_id} указан в BOTS для сообществ {bot_tenants[bot_id]} и {key}")
+        bot_tenants[bot_id] = key
+        configs.append({
+            "tenant": key,
+            "token": item["token"],
+            "channel_id": item.get("channel_id"),
+            "channel_routes": item.get("channel_routes"),
+        })
+    return configs
+
+
+class TenantMiddleware(BaseMiddleware):
+    """Определяет сообщество по боту, получившему апдейт, и передает его обработчикам как tenant."""
+
+    def __init__(self, tenants: dict):
+        self.tenants = tenants
+
+    async def __call__(self, handler, event, data):
+        tenant = self.tenants.get(data["bot"].id)
+        if tenant is None:
+            logger.warning(f"Апдейт от неизвестного бота {data['bot'].id} пропущен")
+            return None
+        data["tenant"] = tenant
+        return await handler(event, data)
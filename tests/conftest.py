@@ -0,0 +1,11 @@
+import os
+import tempfile
+
+# Модули бота читают настройки при импорте: тесты работают с временной SQLite
+# и не обращаются к Telegram
+_TEST_DIR = tempfile.mkdtemp(prefix="resume_bot_tests_")
+os.environ.setdefault("BOT_TOKEN", "123456789:TEST-fake-token")
+os.environ.setdefault("CHANNEL_ID", "@main")
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{os.path.join(_TEST_DIR, 'test.db')}"
+os.environ["CHANNEL_MIN_INTERVAL_SECONDS"] = "0"
+os.environ.pop("BOTS", None)
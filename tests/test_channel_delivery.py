@@ -0,0 +1,182 @@
+import asyncio
+import os
+import sys
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from sqlalchemy import delete, select, update
+
+from src import bot as bot_module
+from src.load_test import RESUME_TEMPLATE, FakeBotAPI
+from src.models import ChannelDelivery, StatCounter, UserMessage
+from src.tenants import Tenant
+
+V1 = "#резюме версия 1"
+V2 = "#резюме версия 2"
+
+
+class FakeBot:
+    """Записывает отправленные сообщения; первая отправка ждет release."""
+
+    def __init__(self, hold_first: bool = False):
+        self.sent = []
+        self.started = asyncio.Event()
+        self.release = asyncio.Event()
+        if not hold_first:
+            self.release.set()
+
+    async def send_message(self, chat_id, text):
+        self.started.set()
+        await self.release.wait()
+        self.sent.append((chat_id, text))
+
+
+async def _reset(message: str) -> int:
+    await bot_module.init_db()
+    async with bot_module.async_session() as session:
+        async with session.begin():
+            await session.execute(delete(ChannelDelivery))
+            await session.execute(delete(UserMessage))
+            await session.execute(delete(StatCounter))
+            user_message = UserMessage(tenant="default", username="alice", message=message, approved=1)
+            session.add(user_message)
+    return user_message.id
+
+
+async def _deliveries(user_message_id: int) -> list:
+    async with bot_module.async_session() as session:
+        stmt = select(ChannelDelivery.channel_id, ChannelDelivery.last_sent).where(
+            ChannelDelivery.user_message_id == user_message_id
+        )
+        return (await session.execute(stmt)).all()
+
+
+async def _reposts() -> int:
+    async with bot_module.async_session() as session:
+        stmt = select(StatCounter.value).where(StatCounter.key.like("reposts:%"))
+        return sum((await session.execute(stmt)).scalars())
+
+
+def test_edit_during_send_does_not_record_outdated_delivery():
+    async def scenario():
+        user_message_id = await _reset(V1)
+        fake_bot = FakeBot(hold_first=True)
+        tenant = Tenant("default", fake_bot, "@main", {})
+        try:
+            sending = asyncio.create_task(bot_module.schedule_message_sending("alice", tenant))
+            await fake_bot.started.wait()
+
+            # Пользователь правит резюме, пока старая версия ждет отправки
+            async with bot_module.async_session() as session:
+                async with session.begin():
+                    await session.execute(
+                        update(UserMessage).where(UserMessage.id == user_message_id).values(message=V2)
+                    )
+            fake_bot.release.set()
+            await sending
+
+            assert fake_bot.sent == [("@main", f"📝 Резюме от @alice:\n\n{V1}")]
+            assert await _deliveries(user_message_id) == []
+            assert await _reposts() == 0
+
+            # Новая версия отправляется сразу, не дожидаясь интервала
+            await bot_module.schedule_message_sending("alice", tenant)
+            assert fake_bot.sent[-1] == ("@main", f"📝 Резюме от @alice:\n\n{V2}")
+            assert [channel for channel, _ in await _deliveries(user_message_id)] == ["@main"]
+            assert await _reposts() == 1
+        finally:
+            await bot_module.engine.dispose()
+
+    asyncio.run(scenario())
+
+
+def test_repeat_send_updates_existing_delivery_row():
+    async def scenario():
+        user_message_id = await _reset(V1)
+        fake_bot = FakeBot()
+        tenant = Tenant("default", fake_bot, "@main", {})
+        try:
+            await bot_module.schedule_message_sending("alice", tenant)
+            # Повторная отправка до истечения интервала не выполняется
+            await bot_module.schedule_message_sending("alice", tenant)
+            assert len(fake_bot.sent) == 1
+
+            long_ago = datetime.now() - timedelta(hours=bot_module.MESSAGE_INTERVAL_HOURS + 1)
+            async with bot_module.async_session() as session:
+                async with session.begin():
+                    await session.execute(update(ChannelDelivery).values(last_sent=long_ago))
+
+            await bot_module.schedule_message_sending("alice", tenant)
+            assert len(fake_bot.sent) == 2
+            deliveries = await _deliveries(user_message_id)
+            assert len(deliveries) == 1
+            assert deliveries[0].last_sent > long_ago
+        finally:
+            await bot_module.engine.dispose()
+
+    asyncio.run(scenario())
+
+
+def _resume_update(update_id: int, version: int) -> dict:
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": 0,
+            "chat": {"id": 42, "type": "private"},
+            "from": {"id": 42, "is_bot": False, "first_name": "Bob", "username": "bob"},
+            "text": RESUME_TEMPLATE.format(years=3, username="bob", version=version),
+        },
+    }
+
+
+async def _drain_background_tasks() -> None:
+    """Ждет проверку резюме и отправку в каналы, запущенные обработчиком."""
+    names = ("check_message_with_neural_net", "send_message_safely")
+    while True:
+        tasks = [
+            task for task in asyncio.all_tasks()
+            if getattr(task.get_coro(), "__name__", "") in names and not task.done()
+        ]
+        if not tasks:
+            return
+        await asyncio.gather(*tasks)
+
+
+def test_edit_keeps_channel_interval():
+    async def scenario():
+        await _reset("#резюме")
+        api = FakeBotAPI(port=18731)
+        await api.start()
+        session = AiohttpSession(api=TelegramAPIServer.from_base(api.base_url))
+        tenant = bot_module.add_tenant("default", Bot(token=bot_module.BOT_TOKEN, session=session), "@main", {})
+        try:
+            await bot_module.dp.feed_raw_update(tenant.bot, _resume_update(1, version=1))
+            await _drain_background_tasks()
+
+            async with bot_module.async_session() as db:
+                stored = (await db.execute(select(UserMessage).where(UserMessage.username == "bob"))).scalar_one()
+            assert stored.approved == 1
+            first_delivery = await _deliveries(stored.id)
+            assert [channel for channel, _ in first_delivery] == ["@main"]
+            assert await _reposts() == 1
+
+            # Правка и повторное одобрение не дают отправить резюме в канал раньше интервала
+            await bot_module.dp.feed_raw_update(tenant.bot, _resume_update(2, version=2))
+            await _drain_background_tasks()
+
+            async with bot_module.async_session() as db:
+                stored = (await db.execute(select(UserMessage).where(UserMessage.username == "bob"))).scalar_one()
+            assert stored.approved == 1 and "Версия 2" in stored.message
+            assert await _deliveries(stored.id) == first_delivery
+            assert await _reposts() == 1
+        finally:
+            await session.close()
+            await api.stop()
+            await bot_module.engine.dispose()
+
+    asyncio.run(scenario())
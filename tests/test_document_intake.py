@@ -0,0 +1,92 @@
+import asyncio
+import os
+import sys
+import time
+import zipfile
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src import document_intake
+from src.document_intake import (
+    DocumentError, DocumentExtractor, DocumentTooLarge, DocumentUnreadable, MAX_DOCX_XML_BYTES, extract_text
+)
+
+W = 'xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"'
+
+
+def _write_docx(path, body: str) -> str:
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("word/document.xml", f"<w:document {W}><w:body>{body}</w:body></w:document>")
+    return str(path)
+
+
+def _paragraph(text: str) -> str:
+    return f"<w:p><w:r><w:t>{text}</w:t></w:r></w:p>"
+
+
+def test_docx_text_is_extracted(tmp_path):
+    path = _write_docx(tmp_path / "resume.docx", _paragraph("#резюме") + _paragraph("Навыки: Python"))
+    assert extract_text(path, "resume.docx", 4000) == "#резюме\nНавыки: Python"
+
+
+def test_docx_rejected_when_uncompressed_xml_is_too_large(tmp_path):
+    path = _write_docx(tmp_path / "bomb.docx", _paragraph("a" * (MAX_DOCX_XML_BYTES + 1)))
+    assert os.path.getsize(path) < 100 * 1024
+    with pytest.raises(DocumentTooLarge):
+        extract_text(path, "bomb.docx", 4000)
+
+
+def test_text_longer_than_limit_is_rejected(tmp_path):
+    docx = _write_docx(tmp_path / "long.docx", _paragraph("слово " * 200) * 10)
+    with pytest.raises(DocumentTooLarge):
+        extract_text(docx, "long.docx", 4000)
+
+    txt = tmp_path / "long.txt"
+    txt.write_text("слово " * 2000, encoding="utf-8")
+    with pytest.raises(DocumentTooLarge):
+        extract_text(str(txt), "long.txt", 4000)
+
+
+def test_parser_error_is_not_shown_to_user(tmp_path):
+    path = tmp_path / "broken.docx"
+    path.write_bytes(b"not a zip archive")
+    extractor = DocumentExtractor(max_workers=1, max_pending=1, timeout=30)
+
+    async def scenario():
+        return await extractor.extract(str(path), "broken.docx", 4000)
+
+    try:
+        with pytest.raises(DocumentUnreadable) as error:
+            asyncio.run(scenario())
+    finally:
+        extractor.shutdown()
+    assert "zip" in error.value.detail
+    assert "zip" not in str(error.value)
+    assert "broken.docx" in str(error.value)
+
+
+def _hang(path, file_name, max_chars):
+    time.sleep(60)
+
+
+def test_hung_extraction_times_out_and_pool_recovers(tmp_path, monkeypatch):
+    path = _write_docx(tmp_path / "resume.docx", _paragraph("#резюме"))
+    extractor = DocumentExtractor(max_workers=1, max_pending=2, timeout=0.5)
+
+    async def scenario():
+        monkeypatch.setattr(document_intake, "extract_text", _hang)
+        started = time.perf_counter()
+        with pytest.raises(DocumentError):
+            await extractor.extract(path, "resume.docx", 4000)
+        assert time.perf_counter() - started < 5
+
+        monkeypatch.setattr(document_intake, "extract_text", extract_text)
+        return await extractor.extract(path, "resume.docx", 4000)
+
+    try:
+        assert asyncio.run(scenario()) == "#резюме"
+        assert extractor.failed == 1
+    finally:
+        extractor.shutdown()
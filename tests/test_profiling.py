@@ -0,0 +1,58 @@
+import asyncio
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aiogram import Bot, Dispatcher, types
+
+from src.profiling import UpdateProfiler
+
+
+def _busy(seconds: float) -> None:
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def test_dump_writes_collapsed_stacks_for_sampled_updates(tmp_path):
+    async def scenario():
+        dp = Dispatcher()
+
+        @dp.message()
+        async def handler(message: types.Message):
+            _busy(0.05)
+
+        profiler = UpdateProfiler(1.0, str(tmp_path), lag_threshold_ms=1000)
+        profiler.install(dp)
+        bot = Bot(token="123456789:TEST-fake-token")
+        try:
+            for update_id in range(1, 6):
+                await dp.feed_raw_update(bot, {
+                    "update_id": update_id,
+                    "message": {
+                        "message_id": update_id,
+                        "date": 0,
+                        "chat": {"id": 1, "type": "private"},
+                        "from": {"id": 1, "is_bot": False, "first_name": "test"},
+                        "text": "#резюме",
+                    },
+                })
+            return await profiler.dump()
+        finally:
+            profiler.sampler.stop()
+            profiler.lag_monitor.stop()
+            await bot.session.close()
+
+    paths = asyncio.run(scenario())
+
+    collapsed = [path for path in paths if os.path.basename(path).startswith("updates-") and path.endswith(".collapsed")]
+    assert len(collapsed) == 1
+    with open(collapsed[0], encoding="utf-8") as fh:
+        lines = fh.read().splitlines()
+    assert lines
+    assert any("_busy" in line for line in lines)
+    for line in lines:
+        stack, value = line.rsplit(" ", 1)
+        assert stack and int(value) >= 1
@@ -0,0 +1,41 @@
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.routing import load_routes, route_channels
+
+ROUTES = load_routes({
+    "java": "@backend",
+    "go": ["@golang"],
+    "react": ["@frontend"],
+    "c++": ["@cpp"],
+})
+
+
+def test_keywords_match_whole_words_only():
+    message = "Навыки: JavaScript, React Native, опыт в Google"
+    assert route_channels(message, ROUTES, "@main") == ["@frontend"]
+
+
+def test_keyword_matches_regardless_of_case_and_punctuation():
+    message = "Стек: Java/Spring, Go. Немного C++"
+    assert route_channels(message, ROUTES, "@main") == ["@backend", "@golang", "@cpp"]
+
+
+def test_section_routes():
+    routes = load_routes({"образование": "@students"})
+    message = "Образование: окончил МГУ"
+    assert route_channels(message, routes, "@main") == ["@students"]
+
+
+def test_default_channel_when_nothing_matches():
+    assert route_channels("Дизайнер интерфейсов", ROUTES, "@main") == ["@main"]
+    assert route_channels("Дизайнер интерфейсов", ROUTES) == []
+
+
+def test_route_all_is_combined_with_default_channel():
+    routes = load_routes({"*": ["@all_jobs"], "python": ["@python", "@all_jobs"]})
+    assert route_channels("Дизайнер интерфейсов", routes, "@main") == ["@all_jobs", "@main"]
+    # Совпавший маршрут заменяет канал по умолчанию, повторы убираются
+    assert route_channels("Python разработчик", routes, "@main") == ["@all_jobs", "@python"]
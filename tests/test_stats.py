@@ -0,0 +1,113 @@
+import asyncio
+import os
+import sys
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src import stats
+from src.db_engine import make_async_engine
+from src.models import Base, StatCounter, UserMessage
+
+
+def _run(tmp_path, scenario):
+    async def wrapper():
+        engine = make_async_engine(f"sqlite:///{tmp_path / 'stats.db'}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+        stats.counters.clear()
+        try:
+            await scenario(async_session)
+        finally:
+            await engine.dispose()
+            stats.counters.clear()
+
+    asyncio.run(wrapper())
+
+
+async def _stored(async_session) -> dict:
+    async with async_session() as session:
+        return dict((await session.execute(select(StatCounter.key, StatCounter.value))).all())
+
+
+def test_commit_updates_table_and_mirror(tmp_path):
+    async def scenario(async_session):
+        for _ in range(2):
+            async with async_session() as session:
+                async with session.begin():
+                    await stats.bump_counters(session, {"pending": 1, "submissions:2026-01-01": 1})
+        async with async_session() as session:
+            async with session.begin():
+                await stats.bump_counters(session, {"pending": -1, "approved": 1}, "backend")
+
+        expected = {"pending": 2, "submissions:2026-01-01": 2, "backend:pending": -1, "backend:approved": 1}
+        assert await _stored(async_session) == expected
+        assert {key: value for key, value in stats.counters.items() if value} == expected
+
+    _run(tmp_path, scenario)
+
+
+def test_rollback_leaves_mirror_unchanged(tmp_path):
+    async def scenario(async_session):
+        async with async_session() as session:
+            async with session.begin():
+                session.add(UserMessage(username="alice", message="#резюме", approved=0))
+                await stats.bump_counters(session, stats.status_change(None, 0))
+
+        # Повторная вставка того же пользователя нарушает уникальный ключ
+        with pytest.raises(IntegrityError):
+            async with async_session() as session:
+                async with session.begin():
+                    await stats.bump_counters(session, stats.status_change(None, 0))
+                    session.add(UserMessage(username="alice", message="#резюме", approved=0))
+
+        assert await _stored(async_session) == {"pending": 1}
+        assert stats.counters["pending"] == 1
+
+    _run(tmp_path, scenario)
+
+
+def test_reconcile_fixes_status_drift_and_prunes_old_daily_keys(tmp_path):
+    async def scenario(async_session):
+        today = date.today()
+        expired = today - timedelta(days=stats.COUNTERS_RETENTION_DAYS + 1)
+        recent = today - timedelta(days=1)
+        async with async_session() as session:
+            async with session.begin():
+                session.add_all([
+                    UserMessage(username="a", message="#резюме", approved=1),
+                    UserMessage(username="b", message="#резюме", approved=1),
+                    UserMessage(username="c", message="#резюме", approved=-1),
+                    UserMessage(tenant="backend", username="a", message="#резюме", approved=0),
+                ])
+                session.add_all([
+                    StatCounter(key="approved", value=7),
+                    StatCounter(key="pending", value=3),
+                    StatCounter(key="backend:rejected", value=2),
+                    StatCounter(key=stats.submissions_key(expired), value=5),
+                    StatCounter(key=stats.submissions_key(recent), value=4),
+                    StatCounter(key=f"backend:{stats.submissions_key(expired)}", value=1),
+                    StatCounter(key=f"reposts:{expired.isoformat()}T08", value=2),
+                ])
+
+        await stats.reconcile_counters(async_session)
+
+        expected = {
+            "approved": 2,
+            "rejected": 1,
+            "pending": 0,
+            "backend:pending": 1,
+            "backend:rejected": 0,
+            stats.submissions_key(recent): 4,
+        }
+        assert await _stored(async_session) == expected
+        assert dict(stats.counters) == expected
+
+    _run(tmp_path, scenario)
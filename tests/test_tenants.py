@@ -0,0 +1,28 @@
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.tenants import load_tenant_configs
+
+
+def _load(bots: list) -> list:
+    return load_tenant_configs(json.dumps(bots), "default", None, None, None)
+
+
+def test_single_default_tenant_without_bots():
+    configs = load_tenant_configs(None, "default", "111:AAA", "@main", {"python": "@py"})
+    assert configs == [{"tenant": "default", "token": "111:AAA", "channel_id": "@main", "channel_routes": {"python": "@py"}}]
+
+
+def test_duplicate_tenant_key_is_rejected():
+    with pytest.raises(ValueError):
+        _load([{"tenant": "a", "token": "111:AAA"}, {"tenant": "a", "token": "222:BBB"}])
+
+
+def test_same_bot_for_two_tenants_is_rejected():
+    with pytest.raises(ValueError):
+        _load([{"tenant": "a", "token": "111:AAA"}, {"tenant": "b", "token": "111:AAA"}])